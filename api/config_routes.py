@@ -1,8 +1,9 @@
 # api/config_routes.py
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 import json
 import os
+import shutil
 from datetime import datetime
 from utils.logging_utils import logger
 
@@ -24,25 +25,30 @@ def save_config_file():
         output_dir = os.getenv('OUTPUT_DIR', './output')
         os.makedirs(output_dir, exist_ok=True)
         
+        # Encode once; the main file and its backup hold the same payload
+        payload = json.dumps(config_data, indent=2)
+        
         # Save main config file
         config_file = os.path.join(output_dir, 'runtime_config.json')
         with open(config_file, 'w') as f:
-            json.dump(config_data, f, indent=2)
+            f.write(payload)
         
         # Also save a timestamped backup
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_file = os.path.join(output_dir, f'config_backup_{timestamp}.json')
         with open(backup_file, 'w') as f:
-            json.dump(config_data, f, indent=2)
+            f.write(payload)
         
         # Clean up old backups (keep only last 10)
-        backup_files = sorted([f for f in os.listdir(output_dir) if f.startswith('config_backup_')])
-        if len(backup_files) > 10:
-            for old_backup in backup_files[:-10]:
-                try:
-                    os.remove(os.path.join(output_dir, old_backup))
-                except:
-                    pass
+        # Timestamped names sort chronologically
+        with os.scandir(output_dir) as entries:
+            backup_files = sorted(entry.path for entry in entries
+                                  if entry.name.startswith('config_backup_') and entry.is_file())
+        for old_backup in backup_files[:-10]:
+            try:
+                os.remove(old_backup)
+            except OSError:
+                pass
         
         logger.info(f"Configuration saved to {config_file}")
         return jsonify({'success': True, 'file': config_file})
@@ -61,10 +67,9 @@ def load_config_file():
         if not os.path.exists(config_file):
             return jsonify({'error': 'No saved configuration found'}), 404
         
-        with open(config_file, 'r') as f:
-            config_data = json.load(f)
-        
-        return jsonify(config_data)
+        # The file is JSON we wrote ourselves, so serve it without re-encoding
+        with open(config_file, 'rb') as f:
+            return Response(f.read(), mimetype='application/json')
         
     except Exception as e:
         logger.error(f"Error loading configuration: {e}")
@@ -77,17 +82,11 @@ def reset_config():
         output_dir = os.getenv('OUTPUT_DIR', './output')
         config_file = os.path.join(output_dir, 'runtime_config.json')
         
-        # Backup current config before reset
+        # Backup current config before reset, then remove the main config file
         if os.path.exists(config_file):
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             backup_file = os.path.join(output_dir, f'config_before_reset_{timestamp}.json')
-            with open(config_file, 'r') as f:
-                current_config = json.load(f)
-            with open(backup_file, 'w') as f:
-                json.dump(current_config, f, indent=2)
-        
-        # Remove the main config file
-        if os.path.exists(config_file):
+            shutil.copyfile(config_file, backup_file)
             os.remove(config_file)
         
         logger.info("Configuration reset to defaults")
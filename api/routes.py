@@ -315,8 +315,7 @@ def register_routes(app, pipeline_state: PipelineState, runtime_config, upload_f
     def get_logs():
         """Get recent pipeline logs."""
         try:
-            with pipeline_state.lock:
-                logs = pipeline_state.state.get('logs', [])[-50:]  # Last 50 logs
+            logs = pipeline_state.recent_logs(50)  # Last 50 logs
             return jsonify({'logs': logs})
         except Exception as e:
             logger.error(f"Logs error: {e}")
@@ -9,7 +9,8 @@ import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from dataclasses import asdict
+from typing import Dict, List, Tuple
+from dataclasses import asdict, is_dataclass
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -18,6 +19,7 @@ from config.settings import Config
 from services.attack_path_analyzer_service import AttackPathAnalyzerService
 from utils.logging_utils import logger, setup_logging
 from utils.progress_utils import write_progress, check_kill_signal, cleanup_progress_file
+from utils.file_utils import read_json_file, write_json_file
 
 # Get configuration
 config = Config.get_config()
@@ -38,8 +40,7 @@ def load_data(config: dict) -> Tuple[List[Dict], Dict]:
         logger.info(f"Loading threats from: {threats_path}")
         write_progress(5, 5, 100, "Loading data", "Reading threat files")
         
-        with open(threats_path, 'r', encoding='utf-8') as f:
-            threats_data = json.load(f)
+        threats_data = read_json_file(threats_path)
         threats = threats_data.get('threats', [])
         
         # Load DFD data
@@ -49,8 +50,7 @@ def load_data(config: dict) -> Tuple[List[Dict], Dict]:
         logger.info(f"Loading DFD from: {dfd_path}")
         write_progress(5, 10, 100, "Loading data", "Reading DFD components")
         
-        with open(dfd_path, 'r', encoding='utf-8') as f:
-            dfd_data = json.load(f)
+        dfd_data = read_json_file(dfd_path)
         
         # Handle nested DFD structure
         if 'dfd' in dfd_data:
@@ -79,7 +79,10 @@ def load_data(config: dict) -> Tuple[List[Dict], Dict]:
 
 def convert_to_dict(obj):
     """Convert dataclass objects to dictionaries recursively."""
-    if hasattr(obj, '__dict__'):
+    if is_dataclass(obj) and not isinstance(obj, type):
+        # Models are slotted, so there is no __dict__ to walk
+        return asdict(obj)
+    elif hasattr(obj, '__dict__'):
         return {k: convert_to_dict(v) for k, v in obj.__dict__.items()}
     elif isinstance(obj, list):
         return [convert_to_dict(item) for item in obj]
@@ -152,8 +155,7 @@ def main():
         output_path = config.get('attack_paths_output') or \
                      os.path.join(config['output_dir'], 'attack_paths.json')
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        write_json_file(output_path, output_data)
         
         logger.info(f"Analysis complete. Results saved to {output_path}")
         
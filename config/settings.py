@@ -25,6 +25,8 @@ class Config:
             'enable_async_processing': os.getenv('ENABLE_ASYNC_PROCESSING', 'true').lower() == 'true',
             'max_concurrent_calls': int(os.getenv('MAX_CONCURRENT_CALLS', '5')),
             'detailed_llm_logging': os.getenv('DETAILED_LLM_LOGGING', 'true').lower() == 'true',
+            'stream_llm_responses': os.getenv('STREAM_LLM_RESPONSES', 'false').lower() == 'true',
+            'per_document_extraction': os.getenv('PER_DOCUMENT_EXTRACTION', 'false').lower() == 'true',
             
             # Debug Configuration
             'debug_mode': os.getenv('DEBUG_MODE', 'false').lower() == 'true',
@@ -38,6 +40,7 @@ class Config:
             'threats_output_path': os.getenv('THREATS_OUTPUT_PATH', './output/identified_threats.json'),
             'refined_threats_output_path': os.getenv('REFINED_THREATS_OUTPUT_PATH', './output/refined_threats.json'),
             'attack_paths_output': os.getenv('ATTACK_PATHS_OUTPUT', './output/attack_paths.json'),
+            'extraction_cache_dir': os.getenv('EXTRACTION_CACHE_DIR', './output/.dfd_cache'),
             
             # Processing Parameters
             'timeout': int(os.getenv('PIPELINE_TIMEOUT', '5000')),
@@ -45,11 +48,19 @@ class Config:
             'max_tokens': int(os.getenv('MAX_TOKENS', '4096')),
             'min_text_length': int(os.getenv('MIN_TEXT_LENGTH', '100')),
             'max_text_length': int(os.getenv('MAX_TEXT_LENGTH', '1000000')),
+            'batch_token_budget': int(os.getenv('BATCH_TOKEN_BUDGET', '6000')),
             
             # Feature Flags
             'enable_quality_check': os.getenv('ENABLE_DFD_QUALITY_CHECK', 'true').lower() == 'true',
             'enable_multi_pass': os.getenv('ENABLE_MULTI_PASS', 'true').lower() == 'true',
             'enable_mermaid': os.getenv('ENABLE_MERMAID', 'true').lower() == 'true',
+            'enable_extraction_cache': os.getenv('ENABLE_EXTRACTION_CACHE', 'true').lower() == 'true',
+            'force_refresh': os.getenv('FORCE_REFRESH', 'false').lower() == 'true',
+            'enable_semantic_cache': os.getenv('ENABLE_SEMANTIC_CACHE', 'false').lower() == 'true',
+            'semantic_cache_model': os.getenv('SEMANTIC_CACHE_MODEL', 'all-MiniLM-L6-v2'),
+            'semantic_cache_threshold': float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92')),
+            'semantic_cache_ttl': int(os.getenv('SEMANTIC_CACHE_TTL', '604800')),
+            'semantic_cache_max_entries': int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '256')),
             'enable_llm_enrichment': os.getenv('ENABLE_LLM_ENRICHMENT', 'true').lower() == 'true',
             'enable_vector_store': os.getenv('ENABLE_VECTOR_STORE', 'false').lower() == 'true',
             'mitre_enabled': os.getenv('MITRE_ENABLED', 'true').lower() == 'true',
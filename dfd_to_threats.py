@@ -21,6 +21,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from dotenv import load_dotenv
 load_dotenv()
 
+from utils.file_utils import read_json_file, write_json_file
+
 def get_config():
     """Get configuration from environment with defaults."""
     return {
@@ -402,8 +404,7 @@ def prioritize_components(components: List[Dict[str, Any]]) -> List[Dict[str, An
 def load_dfd_data(filepath: str) -> Dict[str, Any]:
     """Load DFD data from file."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = read_json_file(filepath)
         
         # Handle nested structure
         if 'dfd' in data:
@@ -583,8 +584,7 @@ def main():
     # Save results
     try:
         write_progress(3, 98, 100, "Saving results", config['threats_output_path'])
-        with open(config['threats_output_path'], 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+        write_json_file(config['threats_output_path'], output)
         
         logger.info(f"Results saved to '{config['threats_output_path']}'")
         write_progress(3, 100, 100, "Complete", f"Generated {len(all_threats)} threats")
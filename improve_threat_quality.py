@@ -18,6 +18,7 @@ from config.settings import Config
 from services.threat_quality_improvement_service import ThreatQualityImprovementService
 from utils.logging_utils import logger, setup_logging
 from utils.progress_utils import write_progress, check_kill_signal, cleanup_progress_file
+from utils.file_utils import read_json_file, write_json_file
 
 # Get configuration
 config = Config.get_config()
@@ -40,8 +41,7 @@ def load_json_file(file_path: str, default: Any = None) -> Any:
     """Load JSON file with error handling."""
     try:
         if Path(file_path).exists():
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = read_json_file(file_path)
             logger.info(f"Successfully loaded {file_path}")
             return data
         else:
@@ -125,8 +125,7 @@ async def main():
         output_path = quality_config.get('refined_threats_output_path') or \
                      os.path.join(config['output_dir'], 'refined_threats.json')
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        write_json_file(output_path, result)
         
         logger.info(f"Saved refined threats to: {output_path}")
         
@@ -10,18 +10,38 @@ import json
 import logging
 import glob
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List, Tuple, Dict, Any
+from typing import List, Optional, Tuple, Dict, Any
 from pathlib import Path
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.settings import Config
-from services.dfd_extraction_service import DFDExtractionService
+from services.dfd_extraction_service import DFDExtractionService, dfd_sizes
 from utils.logging_utils import logger, setup_logging
 from utils.progress_utils import write_progress, check_kill_signal, cleanup_progress_file
 from utils.sample_documents import create_sample_requirements_document
+from utils.file_utils import write_json_file
+
+def _list_txt_files(directory: str) -> list:
+    """Return the visible *.txt files in directory as os.DirEntry objects, in directory order."""
+    try:
+        with os.scandir(directory) as entries:
+            return [entry for entry in entries
+                    if entry.name.endswith('.txt') and not entry.name.startswith('.') and entry.is_file()]
+    except OSError:
+        return []
+
+def _read_text_file(file_path: str) -> Tuple[Optional[str], Optional[Exception]]:
+    """Read an already extracted text file, returning (content, error) so failures stay per file."""
+    try:
+        # Read the text content directly (it's already extracted)
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read(), None
+    except Exception as e:
+        return None, e
 
 class DocumentLoaderService:
     """Service for loading documents from Step 1 output."""
@@ -47,30 +67,32 @@ class DocumentLoaderService:
         step1_files = []
         
         # **ENHANCED PATTERN MATCHING**
+        # One directory scan feeds all three patterns (previously one glob per pattern)
+        txt_entries = _list_txt_files(output_dir)
         
         # Pattern 1: YYYYMMDD_HHMMSS_extracted.txt (standard upload format)
-        extracted_files = glob.glob(os.path.join(output_dir, "*_extracted.txt"))
+        extracted_files = [entry.path for entry in txt_entries if entry.name.endswith('_extracted.txt')]
         step1_files.extend(extracted_files)
         logger.info(f"📄 Found extracted files: {[os.path.basename(f) for f in extracted_files]}")
         
-        # Pattern 2: session_SESSIONID.txt (session-specific files)
-        session_files = glob.glob(os.path.join(output_dir, "session_*.txt"))
+        # Pattern 2: session_SESSIONID.txt (session-specific files), unless already matched above
+        session_files = [entry.path for entry in txt_entries
+                         if entry.name.startswith('session_') and not entry.name.endswith('_extracted.txt')]
         step1_files.extend(session_files)
         logger.info(f"📄 Found session files: {[os.path.basename(f) for f in session_files]}")
         
         # Pattern 3: Recent text files (within last 2 hours, excluding samples)
         current_time = time.time()
         two_hours_ago = current_time - 7200
+        matched = set(step1_files)
         
-        for txt_file in glob.glob(os.path.join(output_dir, "*.txt")):
-            file_mtime = os.path.getmtime(txt_file)
-            basename = os.path.basename(txt_file)
-            
-            if (file_mtime > two_hours_ago and 
-                txt_file not in step1_files and 
+        for entry in txt_entries:
+            basename = entry.name
+            if (entry.path not in matched and 
                 not basename.startswith('sample_') and
-                not basename.startswith('test_')):
-                step1_files.append(txt_file)
+                not basename.startswith('test_') and
+                entry.stat().st_mtime > two_hours_ago):
+                step1_files.append(entry.path)
                 logger.info(f"📄 Found recent file: {basename}")
         
         # **SESSION-SPECIFIC FILE HANDLING**
@@ -133,13 +155,17 @@ class DocumentLoaderService:
         
         logger.info(f"📚 Processing {total_files} Step 1 files")
         
-        for i, file_path in enumerate(step1_files):
+        # Read files concurrently to overlap I/O; map() keeps the original order
+        max_workers = max(1, min(8, os.cpu_count() or 1, total_files))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            read_results = list(executor.map(_read_text_file, step1_files))
+        
+        for file_path, (content, read_error) in zip(step1_files, read_results):
             filename = os.path.basename(file_path)
             
             try:
-                # Read the text content directly (it's already extracted)
-                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                    content = f.read()
+                if read_error is not None:
+                    raise read_error
                 
                 logger.info(f"📖 Read file {filename}: {len(content)} characters")
                 
@@ -289,13 +315,10 @@ def main():
         # Load documents
         write_progress(2, 20, 100, "Loading documents", "Searching for Step 1 output files")
         
-        # Try both input_documents and output directories
-        documents1, doc_info1 = doc_loader.load_documents_from_step1(config['input_dir'])
-        documents2, doc_info2 = doc_loader.load_documents_from_step1(config['output_dir'])
-        
-        # Use whichever has documents
-        documents = documents1 if documents1 else documents2
-        doc_info = doc_info1 if doc_info1 else doc_info2
+        # Try input_documents first; the output directory is only scanned and read if that is empty
+        documents, doc_info = doc_loader.load_documents_from_step1(config['input_dir'])
+        if not documents:
+            documents, doc_info = doc_loader.load_documents_from_step1(config['output_dir'])
         
         if not documents:
             logger.error("No documents found for processing")
@@ -330,24 +353,16 @@ def main():
         
         logger.info(f"💾 Saving DFD to: {output_path}")
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        write_json_file(output_path, result)
         
         # Verify the file was created and has content
         if os.path.exists(output_path):
             file_size = os.path.getsize(output_path)
             logger.info(f"✅ DFD file created successfully: {file_size} bytes")
             
-            # Log some statistics
+            # Log some statistics (already computed by the extraction service)
             if 'dfd' in result and isinstance(result['dfd'], dict):
-                dfd = result['dfd']
-                stats = {
-                    'external_entities': len(dfd.get('external_entities', [])),
-                    'processes': len(dfd.get('processes', [])),
-                    'assets': len(dfd.get('assets', [])),
-                    'data_flows': len(dfd.get('data_flows', [])),
-                    'trust_boundaries': len(dfd.get('trust_boundaries', []))
-                }
+                stats = result.get('metadata', {}).get('extraction_stats') or dfd_sizes(result['dfd'])
                 logger.info(f"📊 DFD Statistics: {stats}")
             
             write_progress(2, 100, 100, "Completed", f"DFD extraction completed successfully")
@@ -4,7 +4,7 @@ Data models for attack path analysis.
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, field
 
-@dataclass
+@dataclass(slots=True)
 class AttackStep:
     """Model for a single step in an attack path."""
     step_number: int
@@ -18,7 +18,7 @@ class AttackStep:
     required_access: Optional[str] = None
     detection_difficulty: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class AttackPath:
     """Model for a complete attack path."""
     path_id: str
@@ -37,7 +37,7 @@ class AttackPath:
     required_resources: List[str] = field(default_factory=list)
     path_complexity: str = "Medium"
 
-@dataclass
+@dataclass(slots=True)
 class AttackPathAnalysis:
     """Complete attack path analysis results."""
     attack_paths: List[AttackPath]
@@ -47,7 +47,7 @@ class AttackPathAnalysis:
     vector_store_insights: Optional[Dict[str, Any]] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class ThreatStats:
     """Statistics for threat processing."""
     original_count: int = 0
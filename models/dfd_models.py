@@ -4,7 +4,7 @@ Data models for DFD extraction and components.
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, field
 
-@dataclass
+@dataclass(slots=True)
 class SimpleDataFlow:
     """Simple data flow model without Pydantic dependency."""
     source: str
@@ -28,7 +28,7 @@ class SimpleDataFlow:
             'encryption_in_transit': self.encryption_in_transit
         }
 
-@dataclass
+@dataclass(slots=True)
 class SimpleDFDComponents:
     """Simple DFD components model without Pydantic dependency."""
     project_name: str = "Unknown Project"
@@ -54,4 +54,31 @@ class SimpleDFDComponents:
             'data_flows': [flow.to_dict() if hasattr(flow, 'to_dict') else flow for flow in self.data_flows],
             'assumptions': self.assumptions,
             'confidence_notes': self.confidence_notes
-        }
\ No newline at end of file
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SimpleDFDComponents':
+        """Rebuild components from the output of to_dict."""
+        data = dict(data)
+        data['data_flows'] = [
+            SimpleDataFlow(**flow) if isinstance(flow, dict) else flow
+            for flow in data.get('data_flows', [])
+        ]
+        return cls(**data)
+    
+    @classmethod
+    def merge(cls, parts: List['SimpleDFDComponents']) -> 'SimpleDFDComponents':
+        """Combine partial extractions into one DFD.
+        
+        Project metadata comes from the first part; component lists are unioned in
+        first-seen order and data flows are concatenated.
+        """
+        first = parts[0]
+        merged = cls(project_name=first.project_name, project_version=first.project_version,
+                     industry_context=first.industry_context)
+        for name in ('external_entities', 'processes', 'assets', 'trust_boundaries',
+                     'assumptions', 'confidence_notes'):
+            setattr(merged, name, list(dict.fromkeys(
+                item for part in parts for item in getattr(part, name))))
+        merged.data_flows = [flow for part in parts for flow in part.data_flows]
+        return merged
@@ -1,15 +1,17 @@
 from datetime import datetime
 import threading
 import uuid
-from collections import defaultdict
+from collections import defaultdict, deque
 import os
-import json
+from utils.file_utils import write_json_file
+
+_MAX_LOG_ENTRIES = 1000
 
 class PipelineState:
     def __init__(self):
         self.state = {
             'current_session': None,
-            'logs': [],
+            'logs': deque(maxlen=_MAX_LOG_ENTRIES),
             'step_outputs': {},
             'validations': {},
             'review_queue': defaultdict(list),
@@ -18,24 +20,29 @@ class PipelineState:
             'progress': {}
         }
         self.lock = threading.Lock()
+        # Logs have their own lock so logging never waits on (or deadlocks with) state updates
+        self.logs_lock = threading.Lock()
 
     def add_log(self, message, log_type='info'):
-        """Add a log entry to the pipeline state."""
-        with self.lock:
-            log_entry = {
-                'timestamp': datetime.now().isoformat(),
-                'type': log_type,
-                'message': message
-            }
+        """Add a log entry to the pipeline state; only the newest entries are kept."""
+        log_entry = {
+            'timestamp': datetime.now().isoformat(),
+            'type': log_type,
+            'message': message
+        }
+        with self.logs_lock:
             self.state['logs'].append(log_entry)
-            if len(self.state['logs']) > 1000:
-                self.state['logs'] = self.state['logs'][-1000:]
+
+    def recent_logs(self, count):
+        """Return the newest count log entries, oldest first."""
+        with self.logs_lock:
+            return list(self.state['logs'])[-count:]
 
     def count_pending_reviews(self):
         """Count total pending reviews across all steps."""
         count = 0
         for step_items in self.state.get('review_queue', {}).values():
-            count += len([item for item in step_items if item['status'] == 'pending'])
+            count += sum(1 for item in step_items if item['status'] == 'pending')
         return count
 
     def reset(self, save_session=False, clean_output=False, output_folder=None):
@@ -51,13 +58,12 @@ class PipelineState:
                 }
                 if output_folder:
                     backup_file = os.path.join(output_folder, f'session_backup_{self.state["current_session"]}.json')
-                    with open(backup_file, 'w') as f:
-                        json.dump(session_backup, f, indent=2)
+                    write_json_file(backup_file, session_backup)
                     self.add_log(f"Session backed up to {os.path.basename(backup_file)}", 'info')
 
             self.state = {
                 'current_session': None,
-                'logs': [],
+                'logs': deque(maxlen=_MAX_LOG_ENTRIES),
                 'step_outputs': {},
                 'validations': {},
                 'review_queue': defaultdict(list),
@@ -67,11 +73,13 @@ class PipelineState:
             }
 
         if clean_output and output_folder:
-            for file in os.listdir(output_folder):
-                if file.endswith('.json') and not file.startswith('session_backup'):
-                    try:
-                        os.remove(os.path.join(output_folder, file))
-                    except Exception:
-                        pass
+            with os.scandir(output_folder) as entries:
+                for entry in entries:
+                    if (entry.name.endswith('.json') and not entry.name.startswith('session_backup')
+                            and entry.is_file()):
+                        try:
+                            os.unlink(entry.path)
+                        except Exception:
+                            pass
 
         self.add_log("Pipeline reset", 'info')
\ No newline at end of file
@@ -1,10 +1,11 @@
 """
 Data models for threat generation and analysis.
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from types import MappingProxyType
 from dataclasses import dataclass, field
 from enum import Enum
-import uuid
+import secrets
 
 class StrideCategory(Enum):
     """STRIDE threat categories."""
@@ -15,7 +16,7 @@ class StrideCategory(Enum):
     DENIAL_OF_SERVICE = "D"
     ELEVATION_OF_PRIVILEGE = "E"
 
-@dataclass
+@dataclass(slots=True)
 class ThreatModel:
     """Model for a security threat."""
     component_name: str
@@ -31,7 +32,7 @@ class ThreatModel:
     def __post_init__(self):
         """Generate threat ID if not provided."""
         if not self.threat_id:
-            self.threat_id = f"THREAT-{uuid.uuid4().hex[:8].upper()}"
+            self.threat_id = f"THREAT-{secrets.token_hex(4).upper()}"
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
@@ -47,13 +48,13 @@ class ThreatModel:
             'risk_score': self.risk_score
         }
 
-@dataclass
+@dataclass(slots=True)
 class ComponentAnalysis:
     """Analysis data for a component."""
     name: str
     type: str
     risk_score: int
-    applicable_stride: List[str]
+    applicable_stride: Tuple[str, ...]
     details: Dict[str, Any] = field(default_factory=dict)
     
     def __str__(self):
@@ -70,23 +71,23 @@ DEFAULT_STRIDE_DEFINITIONS = {
     "E": ("Elevation of Privilege", "A user or process gaining rights beyond their authorized level.")
 }
 
-# Component-specific STRIDE mappings
-COMPONENT_STRIDE_MAPPING = {
-    'External Entity': ['S', 'R'],  # Primarily Spoofing and Repudiation concerns
-    'Process': ['S', 'T', 'R', 'I', 'D', 'E'],  # All STRIDE categories
-    'Data Store': ['T', 'R', 'I', 'D'],  # No Spoofing or Elevation typically
-    'Data Flow': ['T', 'I', 'D'],  # Tampering, Info Disclosure, DoS
-    'Trust Boundary': ['S', 'T', 'E'],  # Spoofing, Tampering, Elevation
-    'Asset': ['T', 'I', 'D'],  # Similar to Data Store
-    'Database': ['T', 'R', 'I', 'D'],  # Similar to Data Store
-    'API': ['S', 'T', 'R', 'I', 'D', 'E'],  # All categories like Process
-    'Service': ['S', 'T', 'R', 'I', 'D', 'E'],  # All categories
-    'Network': ['T', 'I', 'D'],  # Similar to Data Flow
-    'Unknown': ['S', 'T', 'I']  # Conservative default
-}
+# Component-specific STRIDE mappings (read-only; every ComponentAnalysis shares these tuples)
+COMPONENT_STRIDE_MAPPING = MappingProxyType({
+    'External Entity': ('S', 'R'),  # Primarily Spoofing and Repudiation concerns
+    'Process': ('S', 'T', 'R', 'I', 'D', 'E'),  # All STRIDE categories
+    'Data Store': ('T', 'R', 'I', 'D'),  # No Spoofing or Elevation typically
+    'Data Flow': ('T', 'I', 'D'),  # Tampering, Info Disclosure, DoS
+    'Trust Boundary': ('S', 'T', 'E'),  # Spoofing, Tampering, Elevation
+    'Asset': ('T', 'I', 'D'),  # Similar to Data Store
+    'Database': ('T', 'R', 'I', 'D'),  # Similar to Data Store
+    'API': ('S', 'T', 'R', 'I', 'D', 'E'),  # All categories like Process
+    'Service': ('S', 'T', 'R', 'I', 'D', 'E'),  # All categories
+    'Network': ('T', 'I', 'D'),  # Similar to Data Flow
+    'Unknown': ('S', 'T', 'I')  # Conservative default
+})
 
 # Risk-based threat limits per component type
-MAX_THREATS_PER_COMPONENT = {
+MAX_THREATS_PER_COMPONENT = MappingProxyType({
     'External Entity': 2,
     'Process': 3,
     'Data Store': 3,
@@ -98,7 +99,7 @@ MAX_THREATS_PER_COMPONENT = {
     'Service': 3,
     'Network': 2,
     'Unknown': 2
-}
+})
 
 # Risk scoring matrices
 RISK_MATRIX = {
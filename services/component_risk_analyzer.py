@@ -85,7 +85,7 @@ class ComponentRiskAnalyzer:
             # Get applicable STRIDE categories
             applicable_stride = COMPONENT_STRIDE_MAPPING.get(
                 component_type, 
-                ['S', 'T', 'I']  # Default categories
+                ('S', 'T', 'I')  # Default categories
             )
             
             return ComponentAnalysis(
@@ -4,16 +4,48 @@ Main service for orchestrating DFD extraction from documents.
 import os
 import json
 import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any, Tuple
 from models.dfd_models import SimpleDFDComponents
 from services.document_analysis_service import DocumentAnalysisService
-from services.llm_service import LLMService
+from services.extraction_cache import ExtractionCache, SemanticExtractionCache
+from services.llm_service import LLMService, PROMPT_VERSION
 from services.mermaid_generator import MermaidGenerator
-from utils.file_utils import extract_text_from_file
 
 logger = logging.getLogger(__name__)
 
+_DOCUMENT_SEPARATOR = "\n\n--- DOCUMENT SEPARATOR ---\n\n"
+_EXTRACTION_VERSION = "4.0_improved"
+
+# Flow values that do not count as a real classification / authentication mechanism;
+# missing and non-string fields are treated the same way
+_GENERIC_CLASSIFICATIONS = frozenset(('Unknown', 'Internal', ''))
+_GENERIC_AUTHENTICATION = frozenset(('Unknown', 'None', ''))
+
+# Smallest DFD (entities + processes + assets) for which a Mermaid diagram is generated
+_MIN_MERMAID_COMPONENTS = 3
+
+# Number of distinct extractions whose validation results are kept per service
+_VALIDATION_CACHE_SIZE = 32
+
+_DFD_SIZE_KEYS = ('external_entities', 'processes', 'assets', 'data_flows', 'trust_boundaries')
+
+def dfd_sizes(dfd_dict: Dict[str, Any]) -> Dict[str, int]:
+    """Return the number of entries in each DFD component list."""
+    get = dfd_dict.get
+    return {key: len(get(key) or ()) for key in _DFD_SIZE_KEYS}
+
+def extraction_settings(config: Dict[str, Any], per_document: bool) -> Tuple[str, ...]:
+    """Return the settings that determine an extraction result, for cache keys."""
+    return (config.get('llm_provider', ''), config.get('llm_model', ''),
+            _EXTRACTION_VERSION, PROMPT_VERSION, 'per_document' if per_document else 'combined')
+
+def settings_fingerprint(config: Dict[str, Any], per_document: bool) -> str:
+    """Fingerprint the extraction settings alone, so semantic matches stay within one configuration."""
+    return ExtractionCache.make_key((), _DOCUMENT_SEPARATOR, *extraction_settings(config, per_document))
+
 class DFDExtractionService:
     """Main service for DFD extraction."""
     
@@ -22,44 +54,79 @@ class DFDExtractionService:
         self.doc_analyzer = DocumentAnalysisService()
         self.llm_service = LLMService(config)
         self.mermaid_generator = MermaidGenerator()
+        self._validation_cache = OrderedDict()
+        # Runs post-processing that can overlap with the caller: Mermaid generation and cache writes
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="dfd-post")
+        self._pending_store = None
+        self.extraction_cache = None
+        if config.get('enable_extraction_cache', True):
+            try:
+                self.extraction_cache = ExtractionCache(config.get('extraction_cache_dir', './output/.dfd_cache'))
+            except OSError as e:
+                logger.warning(f"Extraction cache disabled: {e}")
+        self.semantic_cache = None
+        if self.extraction_cache is not None and config.get('enable_semantic_cache', False):
+            try:
+                self.semantic_cache = SemanticExtractionCache(
+                    self.extraction_cache.cache_dir,
+                    model_name=config.get('semantic_cache_model', 'all-MiniLM-L6-v2'),
+                    threshold=config.get('semantic_cache_threshold', 0.92),
+                    ttl=config.get('semantic_cache_ttl', 7 * 24 * 3600),
+                    max_entries=config.get('semantic_cache_max_entries', 256)
+                )
+            except (ImportError, OSError) as e:
+                logger.warning(f"Semantic extraction cache disabled: {e}")
     
     def extract_from_documents(self, documents: List[str], document_info: List[str]) -> Dict[str, Any]:
         """Extract DFD from documents with improved processing."""
         
         logger.info("🚀 Starting improved DFD extraction")
-        
-        # Combine and analyze documents
-        combined_content = "\n\n--- DOCUMENT SEPARATOR ---\n\n".join(documents)
-        total_length = len(combined_content)
+
+        # The same upload can be picked up more than once; only send each distinct text to the LLM,
+        # keeping the first occurrence and its document_info entry
+        first_index = {}
+        for i, doc in enumerate(documents):
+            first_index.setdefault(doc, i)
+        if len(first_index) < len(documents):
+            logger.info(f"♻️ Skipping {len(documents) - len(first_index)} duplicate documents")
+            keep = list(first_index.values())
+            if len(document_info) == len(documents):
+                document_info = [document_info[i] for i in keep]
+            documents = [documents[i] for i in keep]
+
+        # Analyze documents one by one; the joined copy is only built for extraction
+        doc_analysis = self.doc_analyzer.analyze_documents(documents, _DOCUMENT_SEPARATOR)
+        total_length = doc_analysis['content_length']
         
         logger.info(f"📝 Processing {total_length} characters from {len(documents)} documents")
         logger.info(f"📄 Documents: {document_info}")
-        
-        # Document analysis
-        doc_analysis = self.doc_analyzer.analyze_document_content(combined_content)
         logger.info(f"📊 Analysis: {doc_analysis['document_type']} | {doc_analysis['industry_context']}")
         
         # Extract components
-        extraction_result = self.llm_service.extract_dfd_components(combined_content, doc_analysis)
+        extraction_result = self._extract_components(documents, doc_analysis)
         
         if not extraction_result:
             logger.error("Component extraction failed")
             return self._create_error_result("Component extraction failed")
         
-        # Validate and improve extraction
-        validation_results = self._validate_extraction(extraction_result)
-        
         # Convert to dictionary format
         dfd_dict = extraction_result.to_dict()
         
-        # Generate Mermaid diagram
-        mermaid_diagram = ""
-        if self.config.get('enable_mermaid', True):
-            try:
-                mermaid_diagram = self.mermaid_generator.generate_threat_modeling_diagram({"dfd": dfd_dict})
-                logger.info("🎨 Mermaid diagram generated successfully")
-            except Exception as e:
-                logger.warning(f"Mermaid generation failed: {e}")
+        extraction_stats = self._get_extraction_stats(dfd_dict)
+        
+        # Generate Mermaid diagram in the background while validating; a DFD with fewer
+        # than three components has nothing worth drawing
+        mermaid_future = None
+        component_count = (extraction_stats['external_entities'] + extraction_stats['processes'] +
+                           extraction_stats['assets'])
+        if self.config.get('enable_mermaid', True) and component_count >= _MIN_MERMAID_COMPONENTS:
+            mermaid_future = self._executor.submit(self._generate_mermaid, dfd_dict)
+        
+        # Validate and improve extraction
+        validation_results = self._validate_extraction(extraction_result)
+        quality_indicators = self._get_quality_indicators(dfd_dict)
+        
+        mermaid_diagram = mermaid_future.result() if mermaid_future is not None else ""
         
         # Store global reference for frontend
         import __main__
@@ -71,15 +138,15 @@ class DFDExtractionService:
             "mermaid": mermaid_diagram,
             "metadata": {
                 "timestamp": datetime.now().isoformat(),
-                "extraction_version": "4.0_improved",
+                "extraction_version": _EXTRACTION_VERSION,
                 "source_documents": document_info,
                 "document_analysis": doc_analysis,
                 "validation_results": validation_results,
                 "llm_provider": self.config.get('llm_provider', 'unknown'),
                 "llm_model": self.config.get('llm_model', 'unknown'),
                 "total_content_length": total_length,
-                "extraction_stats": self._get_extraction_stats(dfd_dict),
-                "quality_indicators": self._get_quality_indicators(dfd_dict)
+                "extraction_stats": extraction_stats,
+                "quality_indicators": quality_indicators
             }
         }
         
@@ -87,8 +154,108 @@ class DFDExtractionService:
         
         return final_result
     
+    def _extract_components(self, documents: List[str], doc_analysis: Dict[str, Any]):
+        """Extract components via the LLM service, reusing a cached result for identical input."""
+        # Let the previous run's cache writes land before reading the caches
+        if self._pending_store is not None:
+            self._pending_store.result()
+            self._pending_store = None
+        
+        # Separate prompts per document only pay off when there is more than one
+        per_document = self.config.get('per_document_extraction', False) and len(documents) > 1
+
+        cache_key = None
+        settings_key = None
+        # Rule-based and debug runs may not reflect an LLM extraction, so they are never cached
+        if (self.extraction_cache is not None
+                and not self.config.get('force_rule_based', False)
+                and not self.config.get('debug_mode', False)):
+            cache_key = ExtractionCache.make_key(documents, _DOCUMENT_SEPARATOR,
+                                                 *extraction_settings(self.config, per_document))
+            settings_key = settings_fingerprint(self.config, per_document)
+            if not self.config.get('force_refresh', False):
+                cached = self.extraction_cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"♻️ Reusing cached extraction {cache_key}")
+                    return SimpleDFDComponents.from_dict(cached)
+        
+        # Fall back to a near-duplicate corpus processed earlier
+        embedding = None
+        if cache_key is not None and self.semantic_cache is not None:
+            try:
+                embedding = self.semantic_cache.embed(documents)
+                if not self.config.get('force_refresh', False):
+                    similar_key = self.semantic_cache.lookup(embedding, doc_analysis['content_length'],
+                                                             settings_key)
+                    cached = self.extraction_cache.get(similar_key) if similar_key else None
+                    if cached is not None:
+                        logger.info(f"♻️ Reusing extraction {similar_key} of a near-duplicate corpus")
+                        return SimpleDFDComponents.from_dict(cached)
+            except Exception as e:
+                logger.warning(f"Semantic cache lookup failed: {e}")
+                embedding = None
+        
+        if per_document:
+            extraction_result = self.llm_service.extract_dfd_components_per_document(documents, doc_analysis)
+        else:
+            combined_content = _DOCUMENT_SEPARATOR.join(documents)
+            extraction_result = self.llm_service.extract_dfd_components(combined_content, doc_analysis)
+            del combined_content
+        
+        if extraction_result and cache_key is not None:
+            # Persist in the background; disk writes overlap with Mermaid generation and validation
+            self._pending_store = self._executor.submit(
+                self._store_extraction, cache_key, extraction_result.to_dict(),
+                embedding, doc_analysis['content_length'], settings_key)
+        return extraction_result
+    
+    def _store_extraction(self, cache_key: str, result_dict: Dict[str, Any], embedding, content_length: int,
+                          settings_key: str) -> None:
+        """Write an extraction to the exact and, if enabled, semantic caches."""
+        try:
+            self.extraction_cache.put(cache_key, result_dict)
+            if embedding is not None:
+                self.semantic_cache.add(embedding, cache_key, content_length, settings_key)
+        except Exception as e:
+            logger.warning(f"Failed to store extraction {cache_key} in cache: {e}")
+    
+    def _generate_mermaid(self, dfd_dict: Dict[str, Any]) -> str:
+        """Generate the Mermaid diagram, returning an empty string on failure."""
+        try:
+            mermaid_diagram = self.mermaid_generator.generate_threat_modeling_diagram({"dfd": dfd_dict})
+            logger.info("🎨 Mermaid diagram generated successfully")
+            return mermaid_diagram
+        except Exception as e:
+            logger.warning(f"Mermaid generation failed: {e}")
+            return ""
+    
     def _validate_extraction(self, extraction: SimpleDFDComponents) -> Dict[str, Any]:
-        """Validate extraction results."""
+        """Validate extraction results, reusing the result for an identical extraction."""
+        data_flows = extraction.data_flows
+        # All flows of one extraction share a type, so pick the accessor once
+        if data_flows and hasattr(data_flows[0], 'source'):
+            endpoints = tuple((flow.source, flow.destination) for flow in data_flows)
+        else:
+            endpoints = tuple((flow.get('source', ''), flow.get('destination', '')) for flow in data_flows)
+        
+        fingerprint = (tuple(extraction.external_entities), tuple(extraction.processes),
+                       tuple(extraction.assets), bool(extraction.trust_boundaries), endpoints)
+        validation = self._validation_cache.get(fingerprint)
+        if validation is None:
+            validation = self._run_validation(extraction, endpoints)
+            if len(self._validation_cache) >= _VALIDATION_CACHE_SIZE:
+                self._validation_cache.popitem(last=False)
+            self._validation_cache[fingerprint] = validation
+        else:
+            self._validation_cache.move_to_end(fingerprint)
+        
+        logger.info(f"🔍 Validation: {len(validation['errors'])} errors, {len(validation['warnings'])} warnings")
+        
+        # Callers may modify the result, so hand out copies of the cached lists
+        return {**validation, "warnings": list(validation["warnings"]), "errors": list(validation["errors"])}
+    
+    def _run_validation(self, extraction: SimpleDFDComponents, endpoints: Tuple[Tuple[str, str], ...]) -> Dict[str, Any]:
+        """Validate component counts, flow endpoints and completeness."""
         validation = {
             "is_valid": True,
             "warnings": [],
@@ -106,58 +273,53 @@ class DFDExtractionService:
             validation["is_valid"] = False
         
         # Check data flow consistency
-        all_components = set(extraction.external_entities + extraction.processes + extraction.assets)
-        
-        for i, flow in enumerate(extraction.data_flows):
-            if hasattr(flow, 'source'):
-                source = flow.source
-                dest = flow.destination
-            else:
-                source = flow.get('source', '')
-                dest = flow.get('destination', '')
-            
+        all_components = frozenset(extraction.external_entities + extraction.processes + extraction.assets)
+        append_error = validation["errors"].append
+        
+        for i, (source, dest) in enumerate(endpoints, 1):
             if source not in all_components:
-                validation["errors"].append(f"Data flow {i+1}: source '{source}' not in components")
+                append_error(f"Data flow {i}: source '{source}' not in components")
             if dest not in all_components:
-                validation["errors"].append(f"Data flow {i+1}: destination '{dest}' not in components")
+                append_error(f"Data flow {i}: destination '{dest}' not in components")
         
         # Calculate completeness
         factors = {
             "has_external_entities": len(extraction.external_entities) > 0,
             "has_processes": len(extraction.processes) > 0,
             "has_assets": len(extraction.assets) > 0,
-            "has_data_flows": len(extraction.data_flows) > 0,
+            "has_data_flows": len(endpoints) > 0,
             "has_trust_boundaries": len(extraction.trust_boundaries) > 0
         }
         
         validation["completeness_score"] = sum(factors.values()) / len(factors)
         
-        logger.info(f"🔍 Validation: {len(validation['errors'])} errors, {len(validation['warnings'])} warnings")
-        
         return validation
     
     def _get_extraction_stats(self, dfd_dict: Dict) -> Dict[str, int]:
         """Get extraction statistics."""
-        return {
-            "external_entities": len(dfd_dict.get('external_entities', [])),
-            "processes": len(dfd_dict.get('processes', [])),
-            "assets": len(dfd_dict.get('assets', [])),
-            "data_flows": len(dfd_dict.get('data_flows', [])),
-            "trust_boundaries": len(dfd_dict.get('trust_boundaries', []))
-        }
+        return dfd_sizes(dfd_dict)
     
     def _get_quality_indicators(self, dfd_dict: Dict) -> Dict[str, bool]:
         """Get quality indicators."""
+        # One pass over the flows, stopping as soon as both indicators are found
+        has_classification = has_authentication = False
+        for flow in dfd_dict.get('data_flows') or ():
+            # Malformed (non-string) values count as generic rather than failing the membership test
+            classification = flow.get('data_classification')
+            if (not has_classification and isinstance(classification, str)
+                    and classification not in _GENERIC_CLASSIFICATIONS):
+                has_classification = True
+            authentication = flow.get('authentication_mechanism')
+            if (not has_authentication and isinstance(authentication, str)
+                    and authentication not in _GENERIC_AUTHENTICATION):
+                has_authentication = True
+            if has_classification and has_authentication:
+                break
+        
         return {
-            "has_trust_boundaries": len(dfd_dict.get('trust_boundaries', [])) > 0,
-            "has_data_classification": any(
-                flow.get('data_classification') not in ['Unknown', 'Internal'] 
-                for flow in dfd_dict.get('data_flows', [])
-            ),
-            "has_authentication": any(
-                flow.get('authentication_mechanism') not in ['Unknown', 'None']
-                for flow in dfd_dict.get('data_flows', [])
-            )
+            "has_trust_boundaries": bool(dfd_dict.get('trust_boundaries')),
+            "has_data_classification": has_classification,
+            "has_authentication": has_authentication
         }
     
     def _create_error_result(self, error_message: str) -> Dict[str, Any]:
@@ -178,7 +340,7 @@ class DFDExtractionService:
             "metadata": {
                 "timestamp": datetime.now().isoformat(),
                 "error": error_message,
-                "extraction_version": "4.0_improved",
+                "extraction_version": _EXTRACTION_VERSION,
                 "status": "failed"
             }
         }
\ No newline at end of file
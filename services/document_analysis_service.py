@@ -3,10 +3,194 @@ Service for analyzing document content and structure.
 """
 import re
 import logging
-from typing import Dict, Any, Tuple
+import functools
+import importlib.util
+from typing import Dict, Any, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# numba is imported on first use (see _jit_kernels); importing it costs more than most analyses
+NUMBA_AVAILABLE = NUMPY_AVAILABLE and importlib.util.find_spec('numba') is not None
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Technical vocabulary counted towards the complexity score (applied to lower-cased content)
+_TECH_TERMS = ("system", "service", "database", "api", "server", "user", "data", "process")
+_TECH_TERMS_RE = re.compile(r'\b(?:' + '|'.join(_TECH_TERMS) + r')\b')
+
+# Markers of diagram/code files, matched against lower-cased content. Mixed-case markers
+# such as 'graph TD' and 'classDef' can never match; they are kept as in the original list.
+_DIAGRAM_INDICATORS = (
+    'graph TD', 'graph TB', 'graph LR', 'flowchart',
+    'subgraph', 'classDef', 'class ',
+    '<?xml', '<svg',
+    'digraph', 'node [', 'edge [',
+    'participant ', 'activate ', 'deactivate ',
+)
+
+# Vocabulary expected in requirements documents
+_TECHNICAL_INDICATORS = (
+    'system', 'user', 'data', 'process', 'service', 'application',
+    'database', 'server', 'client', 'api', 'security', 'authentication',
+    'requirement', 'functional', 'non-functional', 'interface',
+    'architecture', 'component', 'module', 'flow'
+)
+
+# Terms that decide the document type (see DocumentAnalysisService._document_type)
+_DOC_TYPE_TERMS = ("architecture", "api", "endpoint", "rest", "security", "threat")
+
+# Industry keywords in priority order: the first industry with enough hits wins.
+# Within an industry, keywords most common in technical documents come first so the
+# early exit in _detect_industry triggers after as few scans as possible.
+INDUSTRY_KEYWORDS = {
+    "Financial": ("payment", "transaction", "pci", "fraud", "banking", "fintech"),
+    "Healthcare": ("patient", "medical", "healthcare", "phi", "hipaa", "clinical"),
+    "E-commerce": ("customer", "order", "product", "cart", "checkout", "inventory"),
+    "SaaS": ("api", "software", "tenant", "subscription", "saas")
+}
+_INDUSTRY_NAMES = tuple(INDUSTRY_KEYWORDS)
+_KEYWORD_TO_INDUSTRY = {kw: industry for industry, kws in INDUSTRY_KEYWORDS.items() for kw in kws}
+_INDUSTRY_MIN_HITS = 2
+
+# Every term matched as a substring (document type and industry). All are alphanumeric, so
+# any occurrence lies inside a single word and a word-by-word scan finds them all.
+_SUBSTRING_TERMS = tuple(dict.fromkeys(_DOC_TYPE_TERMS + tuple(_KEYWORD_TO_INDUSTRY)))
+assert all(term.isascii() and term.isalnum() for term in _SUBSTRING_TERMS)
+
+if AHOCORASICK_AVAILABLE:
+    # Single-pass matcher for every document-type term and industry keyword
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _term in _SUBSTRING_TERMS:
+        _KEYWORD_AUTOMATON.add_word(_term, _term)
+    _KEYWORD_AUTOMATON.make_automaton()
+    del _term
+
+# Below this size CPython's substring search beats the compiled scan's call overhead
+_NUMBA_MIN_CONTENT_LENGTH = 200_000
+
+def _first_industry(content, kw_buf, kw_offsets, kw_lengths, kw_industry, n_industries, min_hits):
+    """Return the index of the first industry with >= min_hits distinct keywords in content, else -1.
+
+    Pure function over uint8 arrays so it can be compiled with numba.njit.
+    """
+    n_keywords = kw_offsets.shape[0]
+    found = np.zeros(n_keywords, dtype=np.bool_)
+    n = content.shape[0]
+    for k in range(n_keywords):
+        start = kw_offsets[k]
+        length = kw_lengths[k]
+        first = kw_buf[start]
+        for i in range(n - length + 1):
+            if content[i] != first:
+                continue
+            j = 1
+            while j < length and content[i + j] == kw_buf[start + j]:
+                j += 1
+            if j == length:
+                found[k] = True
+                break
+    hits = np.zeros(n_industries, dtype=np.int64)
+    for k in range(n_keywords):
+        if found[k]:
+            hits[kw_industry[k]] += 1
+    for ind in range(n_industries):
+        if hits[ind] >= min_hits:
+            return ind
+    return -1
+
+def _scan_words(content, tech_buf, tech_offsets, tech_lengths,
+                sub_buf, sub_offsets, sub_lengths, sub_first_start, sub_first_order):
+    """Scan lower-cased ASCII content once, word by word.
+
+    Returns (technical term count, found mask over the substring terms). The count equals
+    len(re.findall(r'\b(?:t1|t2|...)\b', content)) for ASCII input. Substring terms are
+    looked up by first byte via the CSR arrays sub_first_start/sub_first_order.
+    Pure function over uint8 arrays so it can be compiled with numba.njit.
+    """
+    n_tech = tech_offsets.shape[0]
+    found = np.zeros(sub_offsets.shape[0], dtype=np.bool_)
+    n = content.shape[0]
+    count = 0
+    i = 0
+    while i < n:
+        c = content[i]
+        if not (97 <= c <= 122 or 48 <= c <= 57 or c == 95 or 65 <= c <= 90):
+            i += 1
+            continue
+        # Start of a word: find its end
+        j = i + 1
+        while j < n:
+            c = content[j]
+            if not (97 <= c <= 122 or 48 <= c <= 57 or c == 95 or 65 <= c <= 90):
+                break
+            j += 1
+        length = j - i
+        
+        # Whole-word technical terms
+        for k in range(n_tech):
+            if tech_lengths[k] != length:
+                continue
+            start = tech_offsets[k]
+            m = 0
+            while m < length and content[i + m] == tech_buf[start + m]:
+                m += 1
+            if m == length:
+                count += 1
+                break
+        
+        # Substring terms starting anywhere inside the word
+        for p in range(i, j):
+            b = content[p]
+            for q in range(sub_first_start[b], sub_first_start[b + 1]):
+                k = sub_first_order[q]
+                if found[k]:
+                    continue
+                term_length = sub_lengths[k]
+                if p + term_length > j:
+                    continue
+                start = sub_offsets[k]
+                m = 1
+                while m < term_length and content[p + m] == sub_buf[start + m]:
+                    m += 1
+                if m == term_length:
+                    found[k] = True
+        i = j
+    return count, found
+
+def _pack_keywords(keywords):
+    """Pack ASCII keywords into (buffer, offsets, lengths) uint8/int64 arrays."""
+    encoded = [kw.encode('ascii') for kw in keywords]
+    lengths = np.array([len(kw) for kw in encoded], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets, lengths
+
+@functools.lru_cache(maxsize=1)
+def _jit_kernels():
+    """Import numba and wrap the scan kernels; returns (_first_industry, _scan_words) compiled."""
+    from numba import njit
+    return njit(cache=True)(_first_industry), njit(cache=True)(_scan_words)
+
+if NUMBA_AVAILABLE:
+    _TECH_BUF, _TECH_OFFSETS, _TECH_LENGTHS = _pack_keywords(_TECH_TERMS)
+    _SUB_BUF, _SUB_OFFSETS, _SUB_LENGTHS = _pack_keywords(_SUBSTRING_TERMS)
+    _SUB_FIRST_ORDER = np.argsort(_SUB_BUF[_SUB_OFFSETS], kind='stable').astype(np.int64)
+    _SUB_FIRST_START = np.searchsorted(_SUB_BUF[_SUB_OFFSETS][_SUB_FIRST_ORDER], np.arange(257)).astype(np.int64)
+
+    _KW_BUF, _KW_OFFSETS, _KW_LENGTHS = _pack_keywords(
+        [kw for kws in INDUSTRY_KEYWORDS.values() for kw in kws])
+    _KW_INDUSTRY_IDX = np.array(
+        [ind for ind, kws in enumerate(INDUSTRY_KEYWORDS.values()) for _ in kws], dtype=np.int64)
+
 class DocumentAnalysisService:
     """Service for analyzing document content to guide DFD extraction."""
     
@@ -34,29 +218,14 @@ class DocumentAnalysisService:
             logger.warning(f"Document truncated to {max_length} characters")
         
         # Check if content looks like a diagram or code rather than requirements
-        diagram_indicators = [
-            'graph TD', 'graph TB', 'graph LR', 'flowchart',
-            'subgraph', 'classDef', 'class ',
-            '<?xml', '<svg',
-            'digraph', 'node [', 'edge [',
-            'participant ', 'activate ', 'deactivate ',
-        ]
-        
         content_lower = content.lower()
-        diagram_count = sum(1 for indicator in diagram_indicators if indicator in content_lower)
+        diagram_count = sum(1 for indicator in _DIAGRAM_INDICATORS if indicator in content_lower)
         
         if diagram_count >= 3:
             return False, content, f"Content appears to be a diagram/code file rather than requirements (found {diagram_count} diagram indicators)"
         
         # Check for basic technical content
-        technical_indicators = [
-            'system', 'user', 'data', 'process', 'service', 'application',
-            'database', 'server', 'client', 'api', 'security', 'authentication',
-            'requirement', 'functional', 'non-functional', 'interface',
-            'architecture', 'component', 'module', 'flow'
-        ]
-        
-        technical_count = sum(1 for indicator in technical_indicators if indicator in content_lower)
+        technical_count = sum(1 for indicator in _TECHNICAL_INDICATORS if indicator in content_lower)
         
         if technical_count < 3:
             return False, content, f"Content lacks technical/requirements terminology (found only {technical_count} technical terms)"
@@ -69,21 +238,102 @@ class DocumentAnalysisService:
         """Analyze document content to guide extraction."""
         content_lower = content.lower()
         
-        # Detect document type
-        doc_type = "technical_requirements"
-        if "architecture" in content_lower:
-            doc_type = "architecture_document"
-        elif "api" in content_lower and ("endpoint" in content_lower or "rest" in content_lower):
-            doc_type = "api_documentation"
-        elif "security" in content_lower and "threat" in content_lower:
-            doc_type = "security_document"
-        
-        # Detect industry
-        industry = DocumentAnalysisService._detect_industry(content_lower)
-        
-        # Calculate complexity
-        complexity = min(len(content) / 10000, 1.0)
-        technical_terms = len(re.findall(r'\b(?:system|service|database|api|server|user|data|process)\b', content_lower))
+        content_bytes = DocumentAnalysisService._scan_buffer(content_lower)
+        if content_bytes is not None:
+            # One compiled pass yields the document type, industry and technical term inputs
+            technical_terms, found_terms = DocumentAnalysisService._scan_words(content_bytes)
+            doc_type = DocumentAnalysisService._document_type(found_terms)
+            industry = DocumentAnalysisService._industry_from_terms(found_terms)
+        else:
+            # Detect document type (substring checks short-circuit on the text itself)
+            doc_type = DocumentAnalysisService._document_type(content_lower)
+            industry = DocumentAnalysisService._detect_industry(content_lower)
+            technical_terms = len(_TECH_TERMS_RE.findall(content_lower))
+        
+        return DocumentAnalysisService._build_analysis(doc_type, industry, len(content), technical_terms)
+    
+    @staticmethod
+    def analyze_documents(documents: List[str], separator: str = "") -> Dict[str, Any]:
+        """
+        Analyze several documents as if they were joined with separator.
+        Each document is lower-cased and scanned on its own, so the joined copy is never built.
+        """
+        if len(documents) == 1:
+            return DocumentAnalysisService.analyze_document_content(documents[0])
+        
+        found_terms = set()
+        technical_terms = 0
+        for doc in documents:
+            technical_terms += DocumentAnalysisService._scan_chunk(doc.lower(), found_terms)
+        
+        total_length = sum(map(len, documents)) + len(separator) * max(len(documents) - 1, 0)
+        doc_type = DocumentAnalysisService._document_type(found_terms)
+        industry = DocumentAnalysisService._industry_from_terms(found_terms)
+        return DocumentAnalysisService._build_analysis(doc_type, industry, total_length, technical_terms)
+    
+    @staticmethod
+    def _scan_chunk(content_lower: str, found_terms: set) -> int:
+        """Record document-type terms and industry keywords found in one chunk; return its technical term count."""
+        content_bytes = DocumentAnalysisService._scan_buffer(content_lower)
+        if content_bytes is not None:
+            technical_terms, chunk_terms = DocumentAnalysisService._scan_words(content_bytes)
+            found_terms.update(chunk_terms)
+            return technical_terms
+        
+        if AHOCORASICK_AVAILABLE:
+            # Every keyword has to be checked here, so one automaton pass beats a scan per keyword
+            for _, term in _KEYWORD_AUTOMATON.iter(content_lower):
+                found_terms.add(term)
+        else:
+            for term in _SUBSTRING_TERMS:
+                if term not in found_terms and term in content_lower:
+                    found_terms.add(term)
+        return len(_TECH_TERMS_RE.findall(content_lower))
+    
+    @staticmethod
+    def _scan_words(content_bytes) -> Tuple[int, set]:
+        """Run the fused word scan; return (technical term count, set of substring terms found)."""
+        _, scan_words = _jit_kernels()
+        count, found = scan_words(content_bytes, _TECH_BUF, _TECH_OFFSETS, _TECH_LENGTHS,
+                                  _SUB_BUF, _SUB_OFFSETS, _SUB_LENGTHS,
+                                  _SUB_FIRST_START, _SUB_FIRST_ORDER)
+        return int(count), {_SUBSTRING_TERMS[k] for k in np.flatnonzero(found)}
+    
+    @staticmethod
+    def _industry_from_terms(found_terms) -> str:
+        """Pick the first industry, in priority order, with enough of its keywords among found_terms."""
+        hits = dict.fromkeys(_INDUSTRY_NAMES, 0)
+        for term in found_terms:
+            industry = _KEYWORD_TO_INDUSTRY.get(term)
+            if industry is not None:
+                hits[industry] += 1
+        return next((name for name in _INDUSTRY_NAMES if hits[name] >= _INDUSTRY_MIN_HITS), "General")
+    
+    @staticmethod
+    def _document_type(terms) -> str:
+        """Classify the document from a lower-cased text or a set of terms found in it."""
+        if "architecture" in terms:
+            return "architecture_document"
+        if "api" in terms and ("endpoint" in terms or "rest" in terms):
+            return "api_documentation"
+        if "security" in terms and "threat" in terms:
+            return "security_document"
+        return "technical_requirements"
+    
+    @staticmethod
+    def _scan_buffer(content_lower: str):
+        """
+        Return content as a uint8 array for the compiled kernels, or None to use the Python path.
+        Only large ASCII documents qualify, since byte word boundaries then match the regex exactly.
+        """
+        if NUMBA_AVAILABLE and len(content_lower) >= _NUMBA_MIN_CONTENT_LENGTH and content_lower.isascii():
+            return np.frombuffer(content_lower.encode('ascii'), dtype=np.uint8)
+        return None
+    
+    @staticmethod
+    def _build_analysis(doc_type: str, industry: str, content_length: int, technical_terms: int) -> Dict[str, Any]:
+        """Assemble the analysis dict, including the complexity score."""
+        complexity = min(content_length / 10000, 1.0)
         complexity += min(technical_terms / 50, 1.0)
         complexity = min(complexity / 2, 1.0)
         
@@ -91,22 +341,32 @@ class DocumentAnalysisService:
             "document_type": doc_type,
             "industry_context": industry,
             "complexity_score": complexity,
-            "content_length": len(content),
+            "content_length": content_length,
             "technical_term_count": technical_terms
         }
     
     @staticmethod
     def _detect_industry(content_lower: str) -> str:
         """Detect industry context from content."""
-        industry_keywords = {
-            "Financial": ["payment", "transaction", "banking", "fintech", "pci", "fraud"],
-            "Healthcare": ["patient", "medical", "hipaa", "phi", "healthcare", "clinical"],
-            "E-commerce": ["cart", "checkout", "order", "product", "inventory", "customer"],
-            "SaaS": ["tenant", "subscription", "api", "saas", "software"]
-        }
+        if NUMBA_AVAILABLE and len(content_lower) >= _NUMBA_MIN_CONTENT_LENGTH:
+            # Keywords are ASCII, so matching on the UTF-8 bytes is equivalent
+            content_bytes = np.frombuffer(content_lower.encode('utf-8'), dtype=np.uint8)
+            first_industry, _ = _jit_kernels()
+            index = first_industry(content_bytes, _KW_BUF, _KW_OFFSETS, _KW_LENGTHS,
+                                   _KW_INDUSTRY_IDX, len(_INDUSTRY_NAMES), _INDUSTRY_MIN_HITS)
+            return _INDUSTRY_NAMES[index] if index >= 0 else "General"
         
-        for industry_name, keywords in industry_keywords.items():
-            if sum(1 for keyword in keywords if keyword in content_lower) >= 2:
-                return industry_name
+        for industry_name, keywords in INDUSTRY_KEYWORDS.items():
+            hits = 0
+            remaining = len(keywords)
+            for keyword in keywords:
+                remaining -= 1
+                if keyword in content_lower:
+                    hits += 1
+                    if hits >= _INDUSTRY_MIN_HITS:
+                        return industry_name
+                elif hits + remaining < _INDUSTRY_MIN_HITS:
+                    # Not enough keywords left for this industry to qualify
+                    break
         
-        return "General"
\ No newline at end of file
+        return "General"
@@ -6,10 +6,29 @@ Enhanced with better session handling and file discovery
 import os
 import glob
 import time
-from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 from utils.logging_utils import logger
 from utils.sample_documents import create_sample_requirements_document
 
+def _list_txt_files(directory: str) -> list:
+    """Return the visible *.txt files in directory as os.DirEntry objects, in directory order."""
+    try:
+        with os.scandir(directory) as entries:
+            return [entry for entry in entries
+                    if entry.name.endswith('.txt') and not entry.name.startswith('.') and entry.is_file()]
+    except OSError:
+        return []
+
+def _read_text_file(file_path: str) -> Tuple[Optional[str], Optional[Exception]]:
+    """Read an already extracted text file, returning (content, error) so failures stay per file."""
+    try:
+        # Read the text content directly (it's already extracted)
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read(), None
+    except Exception as e:
+        return None, e
+
 class DocumentLoaderService:
     """Service for loading documents from Step 1 output."""
     
@@ -34,30 +53,32 @@ class DocumentLoaderService:
         step1_files = []
         
         # **ENHANCED PATTERN MATCHING**
+        # One directory scan feeds all three patterns (previously one glob per pattern)
+        txt_entries = _list_txt_files(output_dir)
         
         # Pattern 1: YYYYMMDD_HHMMSS_extracted.txt (standard upload format)
-        extracted_files = glob.glob(os.path.join(output_dir, "*_extracted.txt"))
+        extracted_files = [entry.path for entry in txt_entries if entry.name.endswith('_extracted.txt')]
         step1_files.extend(extracted_files)
         logger.info(f"📄 Found extracted files: {[os.path.basename(f) for f in extracted_files]}")
         
-        # Pattern 2: session_SESSIONID.txt (session-specific files)
-        session_files = glob.glob(os.path.join(output_dir, "session_*.txt"))
+        # Pattern 2: session_SESSIONID.txt (session-specific files), unless already matched above
+        session_files = [entry.path for entry in txt_entries
+                         if entry.name.startswith('session_') and not entry.name.endswith('_extracted.txt')]
         step1_files.extend(session_files)
         logger.info(f"📄 Found session files: {[os.path.basename(f) for f in session_files]}")
         
         # Pattern 3: Recent text files (within last 2 hours, excluding samples)
         current_time = time.time()
         two_hours_ago = current_time - 7200
+        matched = set(step1_files)
         
-        for txt_file in glob.glob(os.path.join(output_dir, "*.txt")):
-            file_mtime = os.path.getmtime(txt_file)
-            basename = os.path.basename(txt_file)
-            
-            if (file_mtime > two_hours_ago and 
-                txt_file not in step1_files and 
+        for entry in txt_entries:
+            basename = entry.name
+            if (entry.path not in matched and 
                 not basename.startswith('sample_') and
-                not basename.startswith('test_')):
-                step1_files.append(txt_file)
+                not basename.startswith('test_') and
+                entry.stat().st_mtime > two_hours_ago):
+                step1_files.append(entry.path)
                 logger.info(f"📄 Found recent file: {basename}")
         
         # **SESSION-SPECIFIC FILE HANDLING**
@@ -120,13 +141,17 @@ class DocumentLoaderService:
         
         logger.info(f"📚 Processing {total_files} Step 1 files")
         
-        for i, file_path in enumerate(step1_files):
+        # Read files concurrently to overlap I/O; map() keeps the original order
+        max_workers = max(1, min(8, os.cpu_count() or 1, total_files))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            read_results = list(executor.map(_read_text_file, step1_files))
+        
+        for file_path, (content, read_error) in zip(step1_files, read_results):
             filename = os.path.basename(file_path)
             
             try:
-                # Read the text content directly (it's already extracted)
-                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                    content = f.read()
+                if read_error is not None:
+                    raise read_error
                 
                 logger.info(f"📖 Read file {filename}: {len(content)} characters")
                 
@@ -3,6 +3,7 @@ Service for fetching external threat intelligence data.
 """
 import aiohttp
 import logging
+import time
 from typing import Set
 from config.settings import Config
 
@@ -48,8 +49,7 @@ class ExternalDataService:
             parts = cve_id.split('-')
             if len(parts) >= 2:
                 year = int(parts[1])
-                from datetime import datetime
-                cutoff_year = datetime.now().year - self.config['cve_relevance_years']
+                cutoff_year = time.localtime().tm_year - self.config['cve_relevance_years']
                 
                 if year >= cutoff_year:
                     return True
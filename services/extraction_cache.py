@@ -0,0 +1,228 @@
+"""
+Content-addressed cache for DFD extraction results.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import importlib.util
+from typing import Dict, Any, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# sentence-transformers (which loads torch) is only imported once the semantic
+# cache is actually used, so enabling nothing costs nothing at startup
+SEMANTIC_CACHE_AVAILABLE = NUMPY_AVAILABLE and importlib.util.find_spec('sentence_transformers') is not None
+
+# Documents are embedded in chunks so edits past the model's input window still count
+_EMBED_CHUNK_CHARS = 2000
+# Corpora whose lengths differ by more than this fraction are never treated as near-duplicates
+_MAX_LENGTH_DRIFT = 0.1
+
+def _read_json(path: str) -> Any:
+    """Load a JSON file, with orjson when available."""
+    if ORJSON_AVAILABLE:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _write_json_atomic(path: str, data: Any) -> None:
+    """Write data as JSON through a temporary file so readers never see a partial file."""
+    temp_path = path + '.tmp'
+    if ORJSON_AVAILABLE:
+        with open(temp_path, 'wb') as f:
+            f.write(orjson.dumps(data))
+    else:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+    os.replace(temp_path, path)
+
+class ExtractionCache:
+    """
+    Stores extraction results keyed by a hash of the source documents and extraction settings.
+    Uses diskcache when installed, otherwise one JSON file per entry in the cache directory.
+    """
+    
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._cache = diskcache.Cache(cache_dir) if DISKCACHE_AVAILABLE else None
+    
+    @staticmethod
+    def make_key(documents: Iterable[str], separator: str, *settings: str) -> str:
+        """Hash the documents as if joined with separator, plus the settings that shape the result.
+        
+        The key only addresses cache entries, so a fast non-cryptographic hash (xxh3) is used
+        when available; its prefix keeps such keys apart from the blake2b ones.
+        """
+        if XXHASH_AVAILABLE:
+            hasher, prefix = xxhash.xxh3_128(), "x3_"
+        else:
+            hasher, prefix = hashlib.blake2b(digest_size=16), ""
+        for i, doc in enumerate(documents):
+            if i:
+                hasher.update(separator.encode('utf-8'))
+            hasher.update(doc.encode('utf-8'))
+        for setting in settings:
+            hasher.update(b'\0')
+            hasher.update(str(setting).encode('utf-8'))
+        return prefix + hasher.hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key, or None on a miss or unreadable entry."""
+        try:
+            if self._cache is not None:
+                return self._cache.get(key)
+            path = self._entry_path(key)
+            if not os.path.exists(path):
+                return None
+            return _read_json(path)
+        except Exception as e:
+            logger.warning(f"Failed to read extraction cache entry {key}: {e}")
+            return None
+    
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store a JSON-serialisable result under key."""
+        try:
+            if self._cache is not None:
+                self._cache.set(key, value)
+                return
+            _write_json_atomic(self._entry_path(key), value)
+        except Exception as e:
+            logger.warning(f"Failed to write extraction cache entry {key}: {e}")
+    
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+
+class SemanticExtractionCache:
+    """
+    Maps corpus embeddings to ExtractionCache keys so near-duplicate inputs reuse a result.
+    A corpus is represented by the normalised centroid of its chunk embeddings; lookups are a
+    numpy inner product over the normalised vectors (cosine similarity), which stays cheap at
+    max_entries vectors. Entries expire after ttl seconds and the least recently used are evicted
+    beyond max_entries; recency updates from lookups are written with the next add or expiry.
+    Each entry records the fingerprint of the extraction settings (provider, model, prompt
+    version, mode) that produced it, and only entries with the same fingerprint can match.
+    """
+    
+    def __init__(self, cache_dir: str, model_name: str = "all-MiniLM-L6-v2", threshold: float = 0.92,
+                 ttl: int = 7 * 24 * 3600, max_entries: int = 256):
+        if not SEMANTIC_CACHE_AVAILABLE:
+            raise ImportError("sentence-transformers and numpy are required for the semantic cache")
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._model = None
+        # Vectors from different models are not comparable, so each model gets its own index
+        model_tag = hashlib.blake2b(model_name.encode('utf-8'), digest_size=4).hexdigest()
+        self._index_path = os.path.join(cache_dir, f"semantic_index_{model_tag}.json")
+        self._vectors_path = os.path.join(cache_dir, f"semantic_vectors_{model_tag}.npy")
+        os.makedirs(cache_dir, exist_ok=True)
+        self._entries, self._vectors = self._load()
+    
+    def embed(self, documents: List[str]):
+        """Return the normalised centroid embedding of the documents."""
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        chunks = [doc[i:i + _EMBED_CHUNK_CHARS] for doc in documents
+                  for i in range(0, max(len(doc), 1), _EMBED_CHUNK_CHARS)]
+        embeddings = self._model.encode(chunks, normalize_embeddings=True, convert_to_numpy=True)
+        centroid = embeddings.mean(axis=0).astype(np.float32)
+        norm = np.linalg.norm(centroid)
+        return centroid / norm if norm > 0 else centroid
+    
+    def lookup(self, embedding, content_length: int, settings_key: str) -> Optional[str]:
+        """Return the ExtractionCache key of the closest fresh entry above the threshold, if any.
+        
+        Only entries recorded with the same settings_key are considered, so a result produced
+        by another provider, model or prompt version is never reused.
+        """
+        self._expire()
+        candidates = [i for i, entry in enumerate(self._entries) if entry.get("settings") == settings_key]
+        if not candidates:
+            return None
+        
+        scores = self._vectors[candidates] @ embedding
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        
+        entry = self._entries[candidates[best]]
+        if score < self.threshold:
+            return None
+        if abs(entry["content_length"] - content_length) > _MAX_LENGTH_DRIFT * max(content_length, 1):
+            return None
+        
+        logger.info(f"🔎 Semantic cache hit (similarity {score:.3f})")
+        # Only bumps recency in memory; the next add() or _expire() write persists it
+        entry["last_used"] = time.time()
+        return entry["key"]
+    
+    def add(self, embedding, key: str, content_length: int, settings_key: str) -> None:
+        """Record the embedding for an ExtractionCache key, evicting the least recently used entries."""
+        now = time.time()
+        self._entries.append({"key": key, "settings": settings_key, "content_length": content_length,
+                              "created": now, "last_used": now})
+        self._vectors = np.vstack([self._vectors, embedding.reshape(1, -1)]) if len(self._vectors) else embedding.reshape(1, -1)
+        
+        if len(self._entries) > self.max_entries:
+            keep = sorted(range(len(self._entries)), key=lambda i: self._entries[i]["last_used"])[-self.max_entries:]
+            keep.sort()
+            self._entries = [self._entries[i] for i in keep]
+            self._vectors = self._vectors[keep]
+        self._save()
+    
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl
+        keep = [i for i, entry in enumerate(self._entries) if entry["created"] >= cutoff]
+        if len(keep) != len(self._entries):
+            self._entries = [self._entries[i] for i in keep]
+            self._vectors = self._vectors[keep]
+            self._save()
+    
+    def _load(self):
+        try:
+            if os.path.exists(self._index_path) and os.path.exists(self._vectors_path):
+                entries = _read_json(self._index_path)
+                vectors = np.load(self._vectors_path).astype(np.float32)
+                if len(entries) == len(vectors) and entries:
+                    return entries, vectors
+        except Exception as e:
+            logger.warning(f"Failed to load semantic cache index: {e}")
+        return [], np.empty((0, 0), dtype=np.float32)
+    
+    def _save(self) -> None:
+        try:
+            np.save(self._vectors_path, self._vectors)
+            _write_json_atomic(self._index_path, self._entries)
+        except Exception as e:
+            logger.warning(f"Failed to save semantic cache index: {e}")
@@ -6,29 +6,280 @@ PRESERVES ALL ORIGINAL FUNCTIONALITY.
 import json
 import logging
 import asyncio
+import functools
+import importlib.util
+import re
+import threading
 import aiohttp
 import time
 import requests
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, List, Tuple, Union
 from models.dfd_models import SimpleDFDComponents, SimpleDataFlow
 from services.rule_based_extractor import RuleBasedExtractor
+from utils.async_utils import run_async
 
 logger = logging.getLogger(__name__)
 
 # Conditional imports
 try:
-    from openai import OpenAI, AsyncOpenAI
+    from openai import OpenAI, AsyncOpenAI, RateLimitError, APIConnectionError, InternalServerError
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
     logger.warning("OpenAI package not available")
 
+# instructor pulls in pydantic and its provider patches; it is imported when a client is built
+INSTRUCTOR_AVAILABLE = importlib.util.find_spec('instructor') is not None
+if not INSTRUCTOR_AVAILABLE:
+    logger.warning("Instructor package not available")
+
 try:
-    import instructor
-    INSTRUCTOR_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    INSTRUCTOR_AVAILABLE = False
-    logger.warning("Instructor package not available")
+    ORJSON_AVAILABLE = False
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+try:
+    from tenacity import (retry, stop_after_attempt, wait_exponential_jitter,
+                          retry_if_exception_type, before_sleep_log)
+    TENACITY_AVAILABLE = True
+except ImportError:
+    TENACITY_AVAILABLE = False
+
+def _retry_transient(func):
+    """Retry rate limits, connection errors/timeouts and 5xx with jittered backoff."""
+    if not (TENACITY_AVAILABLE and OPENAI_AVAILABLE):
+        return func
+    return retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential_jitter(initial=0.5, max=4),
+        retry=retry_if_exception_type((RateLimitError, APIConnectionError, InternalServerError)),
+        before_sleep=before_sleep_log(logger, logging.WARNING),
+        reraise=True
+    )(func)
+
+# JSON object inside a (optionally language-tagged) markdown fence, else the outermost object.
+# Only the fence ends are matched by regex; the span between them is found with rfind, so
+# malformed responses (many braces, no closing fence) are scanned in linear time.
+_JSON_FENCE_OPEN_RE = re.compile(r'```(?:json)?\s*\{')
+_JSON_FENCE_CLOSE_RE = re.compile(r'\}\s*```')
+
+def _extract_json_text(response_text: str) -> Optional[str]:
+    """Return the JSON object embedded in an LLM response, or None if there is none."""
+    opening = _JSON_FENCE_OPEN_RE.search(response_text)
+    if opening:
+        start = opening.end() - 1
+        closing = None
+        for closing in _JSON_FENCE_CLOSE_RE.finditer(response_text, opening.end()):
+            pass
+        if closing is not None:
+            return response_text[start:closing.start() + 1]
+    start = response_text.find('{')
+    end = response_text.rfind('}')
+    return response_text[start:end + 1] if start != -1 and end > start else None
+
+# Defaults applied to data flow fields the LLM leaves out
+_FLOW_DEFAULTS = {
+    'source': '',
+    'destination': '',
+    'data_description': '',
+    'data_classification': 'Internal',
+    'protocol': 'HTTPS',
+    'authentication_mechanism': 'Unknown',
+    'trust_boundary_crossing': False,
+    'encryption_in_transit': True
+}
+
+_client_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def _get_sync_clients(base_url: str, api_key: str) -> Tuple[Any, Any]:
+    """Build the sync OpenAI client (and its instructor wrapper) once per endpoint and key."""
+    raw_client = OpenAI(base_url=base_url, api_key=api_key)
+    structured_client = None
+    if INSTRUCTOR_AVAILABLE:
+        import instructor
+        structured_client = instructor.from_openai(raw_client)
+    return raw_client, structured_client
+
+@functools.lru_cache(maxsize=1)
+def _get_token_encoding():
+    """Load the tiktoken encoding used for prompt-size estimates (None if unavailable)."""
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"⚠️ Could not load tiktoken encoding: {e}")
+        return None
+
+def _estimate_tokens(text: str) -> int:
+    """Estimate prompt tokens, falling back to ~4 characters per token."""
+    encoding = _get_token_encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+def _loads_json(json_text: Union[str, bytes]) -> Any:
+    """Parse JSON with orjson when available (its errors subclass json.JSONDecodeError)."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(json_text)
+    return json.loads(json_text)
+
+def _dumps_json(obj: Any) -> bytes:
+    """Serialize a request body to UTF-8 JSON bytes, with orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+
+class _StreamedJsonObject:
+    """Collects streamed response text and spots the end of the first top-level JSON object."""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._start = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self._parts)
+
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """Add a chunk; return the first complete JSON object once it has arrived."""
+        offset = self._length
+        self._parts.append(chunk)
+        self._length += len(chunk)
+        for i, char in enumerate(chunk):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '{':
+                if not self._depth:
+                    self._start = offset + i
+                self._depth += 1
+            elif self._depth:
+                if char == '"':
+                    self._in_string = True
+                elif char == '}':
+                    self._depth -= 1
+                    if not self._depth:
+                        # Braces in prose before the JSON can close early; only accept real objects
+                        candidate = self.text()[self._start:offset + i + 1]
+                        try:
+                            if isinstance(_loads_json(candidate), dict):
+                                return candidate
+                        except ValueError:
+                            pass
+        return None
+
+# Leave room for the rest of the prompt
+_MAX_PROMPT_CONTENT_LENGTH = 8000
+
+# JSON shape every extraction prompt asks the model to return
+_DFD_JSON_STRUCTURE = """{
+    "project_name": "descriptive project name",
+    "project_version": "1.0",
+    "industry_context": "industry or domain",
+    "external_entities": ["list of external entities"],
+    "processes": ["list of processes/services"],
+    "assets": ["list of data stores/databases"],
+    "trust_boundaries": ["list of security boundaries"],
+    "data_flows": [
+        {
+            "source": "source component name",
+            "destination": "destination component name",
+            "data_description": "what data is transferred",
+            "data_classification": "Public|Internal|Confidential|PII|PHI|PCI",
+            "protocol": "HTTPS|HTTP|JDBC|API|etc",
+            "authentication_mechanism": "JWT|OAuth|mTLS|API Key|etc",
+            "trust_boundary_crossing": true/false,
+            "encryption_in_transit": true/false
+        }
+    ],
+    "assumptions": ["assumptions made during extraction"],
+    "confidence_notes": ["areas of uncertainty"]
+}"""
+
+# Static extraction prompt scaffolding; bump PROMPT_VERSION when editing it
+PROMPT_VERSION = "1"
+_PROMPT_TEMPLATE = """You are an expert cybersecurity architect analyzing system documentation to extract Data Flow Diagram (DFD) components for threat modeling.
+
+DOCUMENT ANALYSIS:
+- Industry: {industry}
+- Document Type: {doc_type}
+- Content Length: {length} characters
+
+EXTRACTION REQUIREMENTS:
+1. **External Entities**: Users, administrators, external systems, third parties
+2. **Processes**: Services, applications, servers, gateways that process data
+3. **Assets**: Databases, data stores, file systems, caches that store data
+4. **Trust Boundaries**: Security zones, network boundaries, privilege levels
+5. **Data Flows**: Communication between components with security details
+
+CRITICAL RULES:
+- Every data flow source/destination MUST exist in the component lists
+- Use consistent naming (avoid synonyms for the same component)
+- Classify data appropriately: Public < Internal < Confidential < PII/PHI/PCI
+- Include realistic security protocols and authentication mechanisms
+
+DOCUMENT CONTENT:
+{content_excerpt}
+
+Extract comprehensive DFD components as JSON with the following structure:
+""" + _DFD_JSON_STRUCTURE.replace('{', '{{').replace('}', '}}')
+
+# Batched variant: several small documents, one DFD object per document
+_BATCH_PROMPT_HEADER = """You are an expert cybersecurity architect analyzing system documentation to extract Data Flow Diagram (DFD) components for threat modeling.
+
+You are given {count} independent documents. Extract the DFD components of EACH document separately.
+
+EXTRACTION REQUIREMENTS:
+1. **External Entities**: Users, administrators, external systems, third parties
+2. **Processes**: Services, applications, servers, gateways that process data
+3. **Assets**: Databases, data stores, file systems, caches that store data
+4. **Trust Boundaries**: Security zones, network boundaries, privilege levels
+5. **Data Flows**: Communication between components with security details
+
+CRITICAL RULES:
+- Every data flow source/destination MUST exist in the component lists of the same document
+- Use consistent naming (avoid synonyms for the same component)
+- Classify data appropriately: Public < Internal < Confidential < PII/PHI/PCI
+- Include realistic security protocols and authentication mechanisms
+"""
+
+_BATCH_DOCUMENT_TEMPLATE = """
+=== DOCUMENT {index} ===
+- Industry: {industry}
+- Document Type: {doc_type}
+
+{content}
+"""
+
+_BATCH_PROMPT_FOOTER = """
+Respond with a single JSON object {{"results": [...]}} containing exactly {count} DFD objects, in document order. Each object has the following structure:
+""" + _DFD_JSON_STRUCTURE.replace('{', '{{').replace('}', '}}')
+
+# Documents larger than this are never batched; the packer keeps prompts under the budget
+_BATCH_MAX_DOCUMENT_CHARS = 1024
+_DEFAULT_BATCH_TOKEN_BUDGET = 6000
 
 class LLMService:
     """Service for LLM-based DFD extraction with async support."""
@@ -51,20 +302,18 @@ class LLMService:
         """Initialize the LLM client with fallback options."""
         try:
             if self.provider == "scaleway" and OPENAI_AVAILABLE:
-                # Initialize sync clients
-                self.raw_client = OpenAI(
-                    base_url=self.config.get('scw_api_url', 'https://api.scaleway.ai/v1'),
-                    api_key=self.config['scw_secret_key']
-                )
-
-                # Initialize async clients
-                self.async_raw_client = AsyncOpenAI(
-                    base_url=self.config.get('scw_api_url', 'https://api.scaleway.ai/v1'),
-                    api_key=self.config['scw_secret_key']
-                )
-
-                if INSTRUCTOR_AVAILABLE:
-                    self.client = instructor.from_openai(self.raw_client)
+                base_url = self.config.get('scw_api_url', 'https://api.scaleway.ai/v1')
+                api_key = self.config['scw_secret_key']
+
+                # Sync clients are shared by every LLMService in the process
+                with _client_lock:
+                    self.raw_client, structured_client = _get_sync_clients(base_url, api_key)
+
+                # Async client stays per instance: its connection pool is bound to an event loop
+                self.async_raw_client = AsyncOpenAI(base_url=base_url, api_key=api_key)
+
+                if structured_client is not None:
+                    self.client = structured_client
                     logger.info("✅ Scaleway client with instructor initialized")
                 else:
                     logger.info("✅ Scaleway client initialized (no structured output)")
@@ -132,6 +381,23 @@ class LLMService:
             status = "✅" if success else "❌"
             logger.info(f"{status} LLM Call {self.call_count} - {operation}")
 
+    def _log_completion_debug(self, response) -> None:
+        """Log token usage and a response excerpt from a completion that was already made."""
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            logger.debug(f"📏 Tokens: prompt={usage.prompt_tokens}, completion={usage.completion_tokens}, "
+                         f"total={usage.total_tokens}")
+        logger.debug(f"Response was: {(response.choices[0].message.content or '')[:500]}...")
+
+    @staticmethod
+    def _log_ollama_usage(result: Dict[str, Any]) -> None:
+        """Log the token counts Ollama reports alongside a generate response."""
+        if logger.isEnabledFor(logging.DEBUG) and 'eval_count' in result:
+            logger.debug(f"📏 Tokens: prompt={result.get('prompt_eval_count', 0)}, "
+                         f"completion={result.get('eval_count', 0)}")
+
     def _call_ollama(self, prompt: str) -> Optional[str]:
         """Call Ollama API directly (ORIGINAL METHOD PRESERVED)."""
         try:
@@ -153,14 +419,16 @@ class LLMService:
             logger.info("⏳ Waiting for Ollama response...")
             response = requests.post(
                 self.ollama_endpoint,
-                json=payload,
+                data=_dumps_json(payload),
+                headers=_JSON_HEADERS,
                 timeout=self.config.get('timeout', 300)
             )
 
             if response.status_code == 200:
-                result = response.json()
+                result = _loads_json(response.content)
                 response_text = result.get('response', '')
                 logger.info(f"✅ Received response: {len(response_text)} characters")
+                self._log_ollama_usage(result)
                 logger.debug(f"First 200 chars: {response_text[:200]}...")
                 return response_text
             else:
@@ -198,10 +466,12 @@ class LLMService:
             timeout = aiohttp.ClientTimeout(total=self.config.get('timeout', 300))
 
             async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(self.ollama_endpoint, json=payload) as response:
+                async with session.post(self.ollama_endpoint, data=_dumps_json(payload),
+                                        headers=_JSON_HEADERS) as response:
                     if response.status == 200:
-                        result = await response.json()
+                        result = _loads_json(await response.read())
                         response_text = result.get('response', '')
+                        self._log_ollama_usage(result)
                         elapsed = time.time() - start_time
                         self._log_call_progress(f"Ollama async call completed in {elapsed:.1f}s", True)
                         return response_text
@@ -219,6 +489,44 @@ class LLMService:
             logger.error(f"Ollama async API error: {e}")
             return None
 
+    @_retry_transient
+    def _create_completion(self, prompt: str):
+        """Send a chat completion to the sync OpenAI-compatible client."""
+        return self.raw_client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.config.get('temperature', 0.2),
+            max_tokens=self.config.get('max_tokens', 4096)
+        )
+
+    @_retry_transient
+    async def _create_completion_async(self, prompt: str, stream: bool = False):
+        """Send a chat completion to the async OpenAI-compatible client."""
+        return await self.async_raw_client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=self.config.get('temperature', 0.2),
+            max_tokens=self.config.get('max_tokens', 4096),
+            timeout=self.config.get('timeout', 300),
+            stream=stream
+        )
+
+    async def _stream_completion_text_async(self, prompt: str) -> str:
+        """Stream a chat completion and return its concatenated content."""
+        stream = await self._create_completion_async(prompt, stream=True)
+        scanner = _StreamedJsonObject()
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                json_object = scanner.feed(chunk.choices[0].delta.content)
+                if json_object is not None:
+                    # Whatever follows the object (closing fence, commentary) is not needed
+                    await stream.close()
+                    logger.debug(f"📥 Stopped Scaleway stream after a complete JSON object "
+                                 f"({scanner.chunk_count} chunks)")
+                    return json_object
+        logger.debug(f"📥 Streamed {scanner.chunk_count} chunks from Scaleway")
+        return scanner.text()
+
     def extract_dfd_components(self, content: str, doc_analysis: Dict) -> Optional[SimpleDFDComponents]:
         """Extract DFD components using LLM with fallback (ORIGINAL METHOD PRESERVED)."""
         if self.config.get('force_rule_based', False):
@@ -228,7 +536,7 @@ class LLMService:
         # Check if we should use async mode
         if self.config.get('enable_async_processing', True):
             logger.info("⚡ Async processing enabled, using async extraction")
-            return asyncio.run(self.extract_dfd_components_async(content, doc_analysis))
+            return run_async(self.extract_dfd_components_async(content, doc_analysis))
 
         # Original sync logic
         if self.provider == "ollama":
@@ -238,21 +546,17 @@ class LLMService:
 
             if response_text:
                 try:
-                    # Clean the response - remove any markdown or extra text
-                    response_text = response_text.strip()
-
-                    # Find JSON in the response
-                    json_start = response_text.find('{')
-                    json_end = response_text.rfind('}') + 1
+                    # Find JSON in the response, ignoring markdown fences or extra text
+                    json_text = _extract_json_text(response_text)
 
-                    if json_start >= 0 and json_end > json_start:
-                        json_text = response_text[json_start:json_end]
-                        data = json.loads(json_text)
+                    if json_text:
+                        data = _loads_json(json_text)
                         logger.info("✅ Successfully parsed Ollama response")
                         return self._dict_to_simple_components(data)
                     else:
                         logger.error("No valid JSON found in response")
-                        logger.debug(f"Response was: {response_text[:500]}...")
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(f"Response was: {response_text[:500]}...")
                         if self.config.get('debug_mode', False):
                             return self.rule_extractor.extract(content, doc_analysis)
                         else:
@@ -260,7 +564,8 @@ class LLMService:
 
                 except json.JSONDecodeError as e:
                     logger.error(f"Failed to parse Ollama response as JSON: {e}")
-                    logger.debug(f"Response was: {response_text[:500]}...")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Response was: {response_text[:500]}...")
                     if self.config.get('debug_mode', False):
                         return self.rule_extractor.extract(content, doc_analysis)
                     else:
@@ -284,22 +589,17 @@ class LLMService:
             prompt = self._build_extraction_prompt(content, doc_analysis)
 
             logger.info("🔍 Using Scaleway for DFD extraction")
-            response = self.raw_client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt + "\n\nRespond with valid JSON only."}],
-                temperature=self.config.get('temperature', 0.2),
-                max_tokens=self.config.get('max_tokens', 4096)
-            )
+            response = self._create_completion(prompt + "\n\nRespond with valid JSON only.")
+            self._log_completion_debug(response)
 
-            response_text = response.choices[0].message.content.strip()
+            response_text = response.choices[0].message.content
 
             # Clean and parse JSON
-            if response_text.startswith("```json"):
-                response_text = response_text[7:]
-            if response_text.endswith("```"):
-                response_text = response_text[:-3]
+            json_text = _extract_json_text(response_text)
+            if not json_text:
+                raise ValueError("No valid JSON found in Scaleway response")
 
-            data = json.loads(response_text)
+            data = _loads_json(json_text)
             logger.info("✅ Successfully parsed Scaleway response")
             return self._dict_to_simple_components(data)
 
@@ -323,16 +623,11 @@ class LLMService:
 
                 if response_text:
                     try:
-                        # Clean the response - remove any markdown or extra text
-                        response_text = response_text.strip()
+                        # Find JSON in the response, ignoring markdown fences or extra text
+                        json_text = _extract_json_text(response_text)
 
-                        # Find JSON in the response
-                        json_start = response_text.find('{')
-                        json_end = response_text.rfind('}') + 1
-
-                        if json_start >= 0 and json_end > json_start:
-                            json_text = response_text[json_start:json_end]
-                            data = json.loads(json_text)
+                        if json_text:
+                            data = _loads_json(json_text)
                             logger.info("✅ Successfully parsed Ollama async response")
                             return self._dict_to_simple_components(data)
                         else:
@@ -340,7 +635,7 @@ class LLMService:
 
                     except json.JSONDecodeError as e:
                         logger.error(f"Failed to parse Ollama async response as JSON: {e}")
-                        if self.config.get('verbose_error_reporting', True):
+                        if self.config.get('verbose_error_reporting', True) and logger.isEnabledFor(logging.DEBUG):
                             logger.debug(f"Response was: {response_text[:500]}...")
                         raise
                 else:
@@ -352,23 +647,19 @@ class LLMService:
 
                 logger.info("🔍 Using Scaleway for async DFD extraction")
 
-                response = await self.async_raw_client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt + "\n\nRespond with valid JSON only."}],
-                    temperature=self.config.get('temperature', 0.2),
-                    max_tokens=self.config.get('max_tokens', 4096),
-                    timeout=self.config.get('timeout', 300)
-                )
-
-                response_text = response.choices[0].message.content.strip()
+                if self.config.get('stream_llm_responses', False):
+                    response_text = await self._stream_completion_text_async(prompt + "\n\nRespond with valid JSON only.")
+                else:
+                    response = await self._create_completion_async(prompt + "\n\nRespond with valid JSON only.")
+                    self._log_completion_debug(response)
+                    response_text = response.choices[0].message.content
 
                 # Clean and parse JSON
-                if response_text.startswith("```json"):
-                    response_text = response_text[7:]
-                if response_text.endswith("```"):
-                    response_text = response_text[:-3]
+                json_text = _extract_json_text(response_text)
+                if not json_text:
+                    raise ValueError("No valid JSON found in Scaleway async response")
 
-                data = json.loads(response_text)
+                data = _loads_json(json_text)
                 elapsed = time.time() - start_time
                 self._log_call_progress(f"Scaleway async call completed in {elapsed:.1f}s", True)
                 logger.info("✅ Successfully parsed Scaleway async response")
@@ -388,60 +679,170 @@ class LLMService:
                 logger.error(f"❌ LLM async extraction failed: {e}")
                 raise
 
-    def _build_extraction_prompt(self, content: str, doc_analysis: Dict) -> str:
-        """Build extraction prompt (ORIGINAL METHOD PRESERVED)."""
-        # Truncate content if too long for the model
-        max_content_length = 8000  # Leave room for the rest of the prompt
-        if len(content) > max_content_length:
-            content = content[:max_content_length] + "\n... [content truncated]"
+    def extract_dfd_components_batch(self, docs: List[Tuple[str, Dict]]) -> List[Optional[SimpleDFDComponents]]:
+        """Extract DFD components for several documents, packing small ones into shared LLM calls.
+
+        Results are returned in input order. Documents that are too large to batch,
+        and any batch whose response cannot be matched back to its documents, go
+        through extract_dfd_components individually.
+        """
+        results: List[Optional[SimpleDFDComponents]] = [None] * len(docs)
+        remaining = range(len(docs))
+        if not self.config.get('force_rule_based', False) and self.is_available():
+            remaining = self._extract_small_documents(docs, results)
+
+        for i in remaining:
+            content, doc_analysis = docs[i]
+            results[i] = self.extract_dfd_components(content, doc_analysis)
+
+        return results
+
+    def _extract_small_documents(self, docs: List[Tuple[str, Dict]],
+                                 results: List[Optional[SimpleDFDComponents]]) -> List[int]:
+        """Extract the small documents in shared batched calls, filling results in place.
+
+        Returns the indices, in input order, that still need an individual extraction:
+        oversized documents, batches of one, and batches whose response was unusable.
+        """
+        budget = self.config.get('batch_token_budget', _DEFAULT_BATCH_TOKEN_BUDGET)
+        base_tokens = _estimate_tokens(_BATCH_PROMPT_HEADER) + _estimate_tokens(_BATCH_PROMPT_FOOTER)
+
+        batches: List[List[int]] = []
+        singles: List[int] = []
+        current: List[int] = []
+        current_tokens = base_tokens
+        for i, (content, _) in enumerate(docs):
+            if len(content) > _BATCH_MAX_DOCUMENT_CHARS:
+                singles.append(i)
+                continue
+            doc_tokens = _estimate_tokens(content) + 32  # per-document header
+            if current and current_tokens + doc_tokens > budget:
+                batches.append(current)
+                current, current_tokens = [], base_tokens
+            current.append(i)
+            current_tokens += doc_tokens
+        if current:
+            batches.append(current)
+
+        for batch in batches:
+            if len(batch) == 1:
+                singles.append(batch[0])
+                continue
+            batch_results = self._extract_batch([docs[i] for i in batch])
+            if batch_results is None:
+                singles.extend(batch)
+                continue
+            for i, result in zip(batch, batch_results):
+                results[i] = result
+
+        batched = len(docs) - len(singles)
+        if batched:
+            logger.info(f"📦 Extracted {batched} small documents in shared LLM calls "
+                        f"({len(singles)} extracted individually)")
+        return sorted(singles)
+
+    def _extract_batch(self, docs: List[Tuple[str, Dict]]) -> Optional[List[SimpleDFDComponents]]:
+        """Run one batched extraction call; None if the response can't be used."""
+        prompt = _BATCH_PROMPT_HEADER.format(count=len(docs)) + "".join(
+            _BATCH_DOCUMENT_TEMPLATE.format(
+                index=index,
+                industry=doc_analysis.get('industry_context', 'General'),
+                doc_type=doc_analysis.get('document_type', 'Technical'),
+                content=content
+            )
+            for index, (content, doc_analysis) in enumerate(docs, 1)
+        ) + _BATCH_PROMPT_FOOTER.format(count=len(docs)) + "\n\nRespond with valid JSON only."
 
-        return f"""You are an expert cybersecurity architect analyzing system documentation to extract Data Flow Diagram (DFD) components for threat modeling.
+        try:
+            if self.provider == "ollama":
+                response_text = self._call_ollama(prompt)
+            else:
+                response = self._create_completion(prompt)
+                response_text = response.choices[0].message.content
 
-DOCUMENT ANALYSIS:
-- Industry: {doc_analysis.get('industry_context', 'General')}
-- Document Type: {doc_analysis.get('document_type', 'Technical')}
-- Content Length: {len(content)} characters
+            json_text = _extract_json_text(response_text or "")
+            if not json_text:
+                raise ValueError("No valid JSON found in batch response")
 
-EXTRACTION REQUIREMENTS:
-1. **External Entities**: Users, administrators, external systems, third parties
-2. **Processes**: Services, applications, servers, gateways that process data
-3. **Assets**: Databases, data stores, file systems, caches that store data
-4. **Trust Boundaries**: Security zones, network boundaries, privilege levels
-5. **Data Flows**: Communication between components with security details
+            items = _loads_json(json_text).get('results')
+            if not isinstance(items, list) or len(items) != len(docs):
+                raise ValueError(f"Expected {len(docs)} results, got "
+                                 f"{len(items) if isinstance(items, list) else 'none'}")
 
-CRITICAL RULES:
-- Every data flow source/destination MUST exist in the component lists
-- Use consistent naming (avoid synonyms for the same component)
-- Classify data appropriately: Public < Internal < Confidential < PII/PHI/PCI
-- Include realistic security protocols and authentication mechanisms
+            self._log_call_progress(f"Batched extraction of {len(docs)} documents", True)
+            return [self._dict_to_simple_components(item) for item in items]
 
-DOCUMENT CONTENT:
-{content}
+        except Exception as e:
+            self._log_call_progress(f"Batched extraction of {len(docs)} documents", False)
+            logger.warning(f"⚠️ Batched extraction failed: {e} - extracting documents individually")
+            return None
 
-Extract comprehensive DFD components as JSON with the following structure:
-{{
-    "project_name": "descriptive project name",
-    "project_version": "1.0",
-    "industry_context": "industry or domain",
-    "external_entities": ["list of external entities"],
-    "processes": ["list of processes/services"],
-    "assets": ["list of data stores/databases"],
-    "trust_boundaries": ["list of security boundaries"],
-    "data_flows": [
-        {{
-            "source": "source component name",
-            "destination": "destination component name",
-            "data_description": "what data is transferred",
-            "data_classification": "Public|Internal|Confidential|PII|PHI|PCI",
-            "protocol": "HTTPS|HTTP|JDBC|API|etc",
-            "authentication_mechanism": "JWT|OAuth|mTLS|API Key|etc",
-            "trust_boundary_crossing": true/false,
-            "encryption_in_transit": true/false
-        }}
-    ],
-    "assumptions": ["assumptions made during extraction"],
-    "confidence_notes": ["areas of uncertainty"]
-}}"""
+    def extract_dfd_components_per_document(self, documents: List[str], doc_analysis: Dict) -> Optional[SimpleDFDComponents]:
+        """Extract each document separately and merge the partial DFDs.
+
+        Small documents are packed into shared batched prompts first. The rest get
+        their own prompt; with async processing enabled those are sent concurrently,
+        up to max_concurrent_calls at a time, so the provider can batch them server-side.
+        """
+        parts: List[Optional[SimpleDFDComponents]] = [None] * len(documents)
+        remaining = range(len(documents))
+        if not self.config.get('force_rule_based', False) and self.is_available():
+            remaining = self._extract_small_documents([(content, doc_analysis) for content in documents], parts)
+
+        pending = [documents[i] for i in remaining]
+        if not pending:
+            extracted = []
+        elif (self.config.get('force_rule_based', False)
+                or not self.config.get('enable_async_processing', True)):
+            extracted = [self.extract_dfd_components(content, doc_analysis) for content in pending]
+        else:
+            extracted = run_async(self._extract_documents_async(pending, doc_analysis))
+        for i, part in zip(remaining, extracted):
+            parts[i] = part
+
+        parts = [part for part in parts if part is not None]
+        if not parts:
+            return None
+        return SimpleDFDComponents.merge(parts)
+
+    async def _extract_documents_async(self, documents: List[str], doc_analysis: Dict) -> List[Optional[SimpleDFDComponents]]:
+        """Run per-document extractions concurrently, preserving document order."""
+        max_concurrent = self.config.get('max_concurrent_calls', 5)
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def extract_with_semaphore(content):
+            async with semaphore:
+                return await self.extract_dfd_components_async(content, doc_analysis)
+
+        logger.info(f"⚡ Extracting {len(documents)} documents concurrently (max {max_concurrent} parallel)")
+        results = await asyncio.gather(*(extract_with_semaphore(content) for content in documents),
+                                       return_exceptions=True)
+
+        parts = []
+        for index, result in enumerate(results, 1):
+            if isinstance(result, Exception):
+                logger.error(f"❌ Extraction of document {index} failed: {result}")
+                if not self.config.get('debug_mode', False):
+                    raise result
+                parts.append(None)
+            else:
+                parts.append(result)
+        return parts
+
+    def _build_extraction_prompt(self, content: str, doc_analysis: Dict) -> str:
+        """Build extraction prompt (ORIGINAL METHOD PRESERVED)."""
+        # Truncate content if too long for the model (slice once, no copy when short)
+        if len(content) > _MAX_PROMPT_CONTENT_LENGTH:
+            excerpt = content[:_MAX_PROMPT_CONTENT_LENGTH] + "\n... [content truncated]"
+        else:
+            excerpt = content
+
+        return _PROMPT_TEMPLATE.format(
+            industry=doc_analysis.get('industry_context', 'General'),
+            doc_type=doc_analysis.get('document_type', 'Technical'),
+            length=len(excerpt),
+            content_excerpt=excerpt
+        )
 
     def _dict_to_simple_components(self, data: Dict) -> SimpleDFDComponents:
         """Convert dictionary to SimpleDFDComponents (ORIGINAL METHOD PRESERVED)."""
@@ -457,19 +858,12 @@ Extract comprehensive DFD components as JSON with the following structure:
         result.assumptions = data.get('assumptions', [])
         result.confidence_notes = data.get('confidence_notes', [])
 
-        # Convert data flows
-        for flow_data in data.get('data_flows', []):
-            flow = SimpleDataFlow(
-                source=flow_data.get('source', ''),
-                destination=flow_data.get('destination', ''),
-                data_description=flow_data.get('data_description', ''),
-                data_classification=flow_data.get('data_classification', 'Internal'),
-                protocol=flow_data.get('protocol', 'HTTPS'),
-                authentication_mechanism=flow_data.get('authentication_mechanism', 'Unknown'),
-                trust_boundary_crossing=flow_data.get('trust_boundary_crossing', False),
-                encryption_in_transit=flow_data.get('encryption_in_transit', True)
-            )
-            result.data_flows.append(flow)
+        # Convert data flows (unknown keys from the LLM are dropped)
+        result.data_flows.extend(
+            SimpleDataFlow(**{**_FLOW_DEFAULTS,
+                              **{k: v for k, v in flow_data.items() if k in _FLOW_DEFAULTS}})
+            for flow_data in data.get('data_flows', [])
+        )
 
         logger.info(f"📊 Extracted: {len(result.external_entities)} entities, "
                    f"{len(result.processes)} processes, {len(result.assets)} assets, "
@@ -1,12 +1,48 @@
 """
 Service for generating Mermaid diagrams from DFD data.
 """
+import functools
+import io
+import itertools
 import re
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, Tuple
 
 logger = logging.getLogger(__name__)
 
+_NON_ALNUM_RE = re.compile(r'[^a-zA-Z0-9]')
+_UNDERSCORE_RUN_RE = re.compile(r'_+')
+
+_EXTERNAL_KEYWORDS = ('user', 'client', 'external', 'internet', 'public')
+_DMZ_KEYWORDS = ('gateway', 'proxy', 'load balancer', 'firewall', 'waf')
+_DATA_KEYWORDS = ('database', 'db', 'storage', 'cache', 'repository')
+
+@functools.lru_cache(maxsize=4096)
+def safe_id(text: str) -> str:
+    """Create safe Mermaid node ID."""
+    if not text:
+        return 'unknown'
+    # Replace non-alphanumeric with underscore, limit length
+    safe = _NON_ALNUM_RE.sub('_', str(text))
+    safe = _UNDERSCORE_RUN_RE.sub('_', safe).strip('_')
+    if safe and safe[0].isdigit():
+        safe = 'node_' + safe
+    return safe[:20] or 'unknown'
+
+@functools.lru_cache(maxsize=4096)
+def get_trust_zone(name: str, comp_type: str) -> str:
+    """Determine trust zone for component."""
+    name_lower = name.lower()
+    
+    if comp_type == 'external' or any(keyword in name_lower for keyword in _EXTERNAL_KEYWORDS):
+        return 'external'
+    elif any(keyword in name_lower for keyword in _DMZ_KEYWORDS):
+        return 'dmz'
+    elif any(keyword in name_lower for keyword in _DATA_KEYWORDS):
+        return 'data'
+    else:
+        return 'application'
+
 class MermaidGenerator:
     """Generate Mermaid diagrams for threat modeling visualization."""
     
@@ -20,122 +56,108 @@ class MermaidGenerator:
             return ""
         
         dfd = dfd_data['dfd']
-        lines = ['graph TB']
+        buf = io.StringIO()
+        w = buf.write
+        w('graph TB\n')
         
         # Group components by trust zones
-        zones = MermaidGenerator._categorize_components(dfd)
-        all_components = MermaidGenerator._create_component_mapping(dfd, zones)
+        zones, all_components = MermaidGenerator._categorize_components(dfd)
         
-        # Generate trust zone subgraphs
-        lines.extend(MermaidGenerator._generate_zone_subgraphs(zones))
+        # Generate trust zone subgraphs, collecting class directives in the same pass
+        class_buf = io.StringIO()
+        MermaidGenerator._write_zone_subgraphs(zones, w, class_buf.write)
         
         # Add data flows
-        lines.extend(MermaidGenerator._generate_data_flows(dfd, all_components))
+        MermaidGenerator._write_data_flows(dfd, all_components, w)
         
         # Add styling
-        lines.extend(MermaidGenerator._generate_styling(zones))
+        MermaidGenerator._write_styling(class_buf.getvalue(), w)
         
         # Add legend
-        lines.extend(MermaidGenerator._generate_legend())
+        w(MermaidGenerator._LEGEND)
         
-        result = '\n'.join(lines)
-        logger.info(f"✅ Generated Mermaid diagram with {len(lines)} lines")
+        result = buf.getvalue()
+        logger.info(f"✅ Generated Mermaid diagram with {result.count(chr(10)) + 1} lines")
         return result
     
-    @staticmethod
-    def safe_id(text: str) -> str:
-        """Create safe Mermaid node ID."""
-        if not text:
-            return 'unknown'
-        # Replace non-alphanumeric with underscore, limit length
-        safe = re.sub(r'[^a-zA-Z0-9]', '_', str(text))
-        safe = re.sub(r'_+', '_', safe).strip('_')
-        if safe and safe[0].isdigit():
-            safe = 'node_' + safe
-        return safe[:20] or 'unknown'
-    
-    @staticmethod
-    def _get_trust_zone(name: str, comp_type: str) -> str:
-        """Determine trust zone for component."""
-        name_lower = name.lower()
-        
-        if comp_type == 'external' or any(keyword in name_lower for keyword in 
-            ['user', 'client', 'external', 'internet', 'public']):
-            return 'external'
-        elif any(keyword in name_lower for keyword in 
-            ['gateway', 'proxy', 'load balancer', 'firewall', 'waf']):
-            return 'dmz'
-        elif any(keyword in name_lower for keyword in 
-            ['database', 'db', 'storage', 'cache', 'repository']):
-            return 'data'
-        else:
-            return 'application'
+    safe_id = staticmethod(safe_id)
+    _get_trust_zone = staticmethod(get_trust_zone)
     
     @staticmethod
-    def _categorize_components(dfd: Dict) -> Dict[str, List[Dict]]:
-        """Categorize components into trust zones."""
-        zones = {'external': [], 'dmz': [], 'application': [], 'data': []}
-        
-        # Process components
-        for entity in dfd.get('external_entities', []):
-            zone = MermaidGenerator._get_trust_zone(entity, 'external')
-            comp_id = MermaidGenerator.safe_id(entity)
-            zones[zone].append({'id': comp_id, 'name': entity, 'type': 'entity'})
-        
-        for process in dfd.get('processes', []):
-            zone = MermaidGenerator._get_trust_zone(process, 'process')
-            comp_id = MermaidGenerator.safe_id(process)
-            zones[zone].append({'id': comp_id, 'name': process, 'type': 'process'})
+    def _categorize_components(dfd: Dict) -> Tuple[Dict[str, Dict[str, List[str]]], Dict[str, str]]:
+        """Categorize components into trust zones and map component names to IDs in one pass.
         
-        for asset in dfd.get('assets', []):
-            zone = MermaidGenerator._get_trust_zone(asset, 'asset')
-            comp_id = MermaidGenerator.safe_id(asset)
-            zones[zone].append({'id': comp_id, 'name': asset, 'type': 'asset'})
-        
-        return zones
-    
-    @staticmethod
-    def _create_component_mapping(dfd: Dict, zones: Dict) -> Dict[str, str]:
-        """Create mapping from component names to IDs."""
+        Zones are stored as parallel 'ids'/'names'/'types' lists rather than per-component dicts.
+        """
+        zones = {zone: {'ids': [], 'names': [], 'types': []}
+                 for zone in ('external', 'dmz', 'application', 'data')}
         all_components = {}
         
-        for entity in dfd.get('external_entities', []):
-            all_components[entity] = MermaidGenerator.safe_id(entity)
-        
-        for process in dfd.get('processes', []):
-            all_components[process] = MermaidGenerator.safe_id(process)
-        
-        for asset in dfd.get('assets', []):
-            all_components[asset] = MermaidGenerator.safe_id(asset)
-        
-        return all_components
+        components = itertools.chain(
+            ((entity, 'entity', 'external') for entity in dfd.get('external_entities', [])),
+            ((process, 'process', 'process') for process in dfd.get('processes', [])),
+            ((asset, 'asset', 'asset') for asset in dfd.get('assets', []))
+        )
+        for name, comp_type, zone_hint in components:
+            comp_id = safe_id(name)
+            all_components[name] = comp_id
+            zone = zones[get_trust_zone(name, zone_hint)]
+            zone['ids'].append(comp_id)
+            zone['names'].append(name)
+            zone['types'].append(comp_type)
+        
+        return zones, all_components
+    
+    _ZONE_TITLES = {
+        'external': '🌐 External Zone (Untrusted)',
+        'dmz': '🛡️ DMZ Zone (Semi-Trusted)', 
+        'application': '🏢 Application Zone (Trusted)',
+        'data': '💾 Data Zone (Critical Assets)'
+    }
+    
+    _TYPE_ICONS = {'entity': '👤', 'asset': '💾', 'process': '⚙️'}
+    
+    _STYLING_HEADER = (
+        '\n'
+        '    %% Trust Zone Styling\n'
+        '    classDef external fill:#ff4757,stroke:#ff3742,stroke-width:3px,color:#fff\n'
+        '    classDef dmz fill:#ffa502,stroke:#ff8c00,stroke-width:2px,color:#000\n'
+        '    classDef application fill:#3742fa,stroke:#2f40fa,stroke-width:2px,color:#fff\n'
+        '    classDef data fill:#2ed573,stroke:#20bf6b,stroke-width:2px,color:#000\n'
+        '\n'
+    )
+    
+    _LEGEND = (
+        '\n'
+        '    %% THREAT MODELING LEGEND:\n'
+        '    %% 🌐 Red External: Untrusted attack surface\n'
+        '    %% 🛡️ Orange DMZ: Semi-trusted exposed services\n' 
+        '    %% 🏢 Blue Application: Trusted business logic\n'
+        '    %% 💾 Green Data: Critical assets needing protection\n'
+        '    %% === High-risk data flows (PII/PHI/PCI)\n'
+        '    %% --- Medium-risk flows (Confidential)\n'
+        '    %% -.- Low-risk flows (Internal/Public)'
+    )
     
     @staticmethod
-    def _generate_zone_subgraphs(zones: Dict) -> List[str]:
-        """Generate subgraph definitions for trust zones."""
-        lines = []
-        zone_titles = {
-            'external': '🌐 External Zone (Untrusted)',
-            'dmz': '🛡️ DMZ Zone (Semi-Trusted)', 
-            'application': '🏢 Application Zone (Trusted)',
-            'data': '💾 Data Zone (Critical Assets)'
-        }
-        
-        for zone, components in zones.items():
-            if components:
-                lines.append(f'    subgraph {zone}["{zone_titles[zone]}"]')
-                for comp in components:
-                    icon = '👤' if comp['type'] == 'entity' else '💾' if comp['type'] == 'asset' else '⚙️'
-                    lines.append(f'        {comp["id"]}["{icon} {comp["name"]}"]')
-                lines.append('    end')
-                lines.append('')
-        
-        return lines
+    def _write_zone_subgraphs(zones: Dict, w: Callable[[str], Any], class_w: Callable[[str], Any]) -> None:
+        """Write subgraph definitions for trust zones and collect their class directives."""
+        zone_titles = MermaidGenerator._ZONE_TITLES
+        icons = MermaidGenerator._TYPE_ICONS
+        
+        for zone, columns in zones.items():
+            ids = columns['ids']
+            if ids:
+                w(f'    subgraph {zone}["{zone_titles[zone]}"]\n')
+                for comp_id, name, comp_type in zip(ids, columns['names'], columns['types']):
+                    w(f'        {comp_id}["{icons[comp_type]} {name}"]\n')
+                w('    end\n\n')
+                class_w(f'    class {",".join(ids)} {zone}\n')
     
     @staticmethod
-    def _generate_data_flows(dfd: Dict, all_components: Dict) -> List[str]:
-        """Generate data flow connections."""
-        lines = ['    %% Data Flows with Security Context']
+    def _write_data_flows(dfd: Dict, all_components: Dict, w: Callable[[str], Any]) -> None:
+        """Write data flow connections."""
+        w('    %% Data Flows with Security Context\n')
         
         for flow in dfd.get('data_flows', []):
             source_id = all_components.get(flow.get('source'))
@@ -159,42 +181,12 @@ class MermaidGenerator:
             encrypted = '🔒' if flow.get('encryption_in_transit') else '🔓'
             
             label = f"{protocol}|{data_class}|{auth[:10]}|{encrypted}"
-            lines.append(f'    {source_id} {arrow}|"{label}"| {dest_id}')
-        
-        return lines
+            w(f'    {source_id} {arrow}|"{label}"| {dest_id}\n')
     
     @staticmethod
-    def _generate_styling(zones: Dict) -> List[str]:
-        """Generate styling for the diagram."""
-        lines = [
-            '',
-            '    %% Trust Zone Styling',
-            '    classDef external fill:#ff4757,stroke:#ff3742,stroke-width:3px,color:#fff',
-            '    classDef dmz fill:#ffa502,stroke:#ff8c00,stroke-width:2px,color:#000',
-            '    classDef application fill:#3742fa,stroke:#2f40fa,stroke-width:2px,color:#fff',
-            '    classDef data fill:#2ed573,stroke:#20bf6b,stroke-width:2px,color:#000',
-            ''
-        ]
+    def _write_styling(class_directives: str, w: Callable[[str], Any]) -> None:
+        """Write styling for the diagram."""
+        w(MermaidGenerator._STYLING_HEADER)
         
-        # Apply zone classes
-        for zone, components in zones.items():
-            if components:
-                comp_ids = [comp['id'] for comp in components]
-                lines.append(f'    class {",".join(comp_ids)} {zone}')
-        
-        return lines
-    
-    @staticmethod
-    def _generate_legend() -> List[str]:
-        """Generate legend comments."""
-        return [
-            '',
-            '    %% THREAT MODELING LEGEND:',
-            '    %% 🌐 Red External: Untrusted attack surface',
-            '    %% 🛡️ Orange DMZ: Semi-trusted exposed services', 
-            '    %% 🏢 Blue Application: Trusted business logic',
-            '    %% 💾 Green Data: Critical assets needing protection',
-            '    %% === High-risk data flows (PII/PHI/PCI)',
-            '    %% --- Medium-risk flows (Confidential)',
-            '    %% -.- Low-risk flows (Internal/Public)'
-        ]
\ No newline at end of file
+        # Apply zone classes (collected while writing the subgraphs)
+        w(class_directives)
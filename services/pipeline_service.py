@@ -7,14 +7,48 @@ import json
 import os
 import subprocess
 import sys
+import threading
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from services.review_service import ReviewService
 from services.validation_service import ValidationService
-from utils.file_utils import save_step_data
+from utils.file_utils import save_step_data, read_json_file
 from models.pipeline_state import PipelineState
 from utils.logging_utils import logger
 
+# Lines of a step script's stdout/stderr kept for logs and error messages
+_OUTPUT_TAIL_LINES = 200
+
+def _drain_pipe(pipe, tail: deque) -> None:
+    """Read a child pipe to EOF, keeping only its last lines."""
+    with pipe:
+        for line in pipe:
+            tail.append(line)
+
+def _run_script(args: list, env: Dict[str, str], timeout: float) -> Tuple[int, str, str]:
+    """
+    Run a step script like subprocess.run, but stream its output instead of buffering all of it.
+    Returns (returncode, stdout_tail, stderr_tail); raises TimeoutExpired after killing the child.
+    """
+    process = subprocess.Popen(args, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    stdout_tail = deque(maxlen=_OUTPUT_TAIL_LINES)
+    stderr_tail = deque(maxlen=_OUTPUT_TAIL_LINES)
+    readers = [threading.Thread(target=_drain_pipe, args=(process.stdout, stdout_tail), daemon=True),
+               threading.Thread(target=_drain_pipe, args=(process.stderr, stderr_tail), daemon=True)]
+    for reader in readers:
+        reader.start()
+    try:
+        returncode = process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        for reader in readers:
+            reader.join()
+    return returncode, "".join(stdout_tail), "".join(stderr_tail)
+
 class PipelineService:
     @staticmethod
     def update_progress(session_id: str, step: int, data: dict, pipeline_state: PipelineState, socketio) -> None:
@@ -69,9 +103,7 @@ class PipelineService:
             return False
             
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-            return bool(data)
+            return bool(read_json_file(file_path))
         except Exception:
             return False
 
@@ -89,8 +121,7 @@ class PipelineService:
         if not output_file:
             raise ValueError(f"Invalid step number: {step}")
         
-        file_path = os.path.join(output_folder, output_file)
-        save_step_data(data, file_path)
+        save_step_data(step, data, output_folder)
         
         # Update pipeline state
         with pipeline_state.lock:
@@ -126,8 +157,7 @@ class PipelineService:
             file_path = os.path.join(output_folder, filename)
             if os.path.exists(file_path):
                 try:
-                    with open(file_path, 'r') as f:
-                        data = json.load(f)
+                    data = read_json_file(file_path)
                     with pipeline_state.lock:
                         pipeline_state.state['step_outputs'][step] = data
                     loaded.append(f"Step {step}: {filename}")
@@ -162,12 +192,11 @@ class PipelineService:
                     dfd_file = os.path.join(output_folder, 'dfd_components.json')
                     if os.path.exists(dfd_file):
                         try:
-                            with open(dfd_file, 'r') as f:
-                                dfd_data = json.load(f)
-                                # Store in pipeline state for next steps
-                                with pipeline_state.lock:
-                                    pipeline_state.state['step_outputs'][2] = dfd_data
-                                logger.info(f"Loaded DFD data from file for step 3")
+                            dfd_data = read_json_file(dfd_file)
+                            # Store in pipeline state for next steps
+                            with pipeline_state.lock:
+                                pipeline_state.state['step_outputs'][2] = dfd_data
+                            logger.info(f"Loaded DFD data from file for step 3")
                         except Exception as e:
                             logger.error(f"Failed to load DFD data: {e}")
                             raise ValueError(f'Step 2 output (DFD) is missing or invalid')
@@ -314,34 +343,31 @@ class PipelineService:
             logger.info(f"Environment - INPUT_DIR: {env.get('INPUT_DIR', 'NOT SET')}")
             logger.info(f"Environment - OUTPUT_DIR: {env.get('OUTPUT_DIR', 'NOT SET')}")
             
-            result = subprocess.run(
+            returncode, stdout, stderr = _run_script(
                 [sys.executable, script_name],
-                env=env,
-                capture_output=True,
-                text=True,
-                timeout=runtime_config.get('timeout', 300)
+                env,
+                runtime_config.get('timeout', 300)
             )
             
-            # Log output for debugging
-            if result.stdout:
-                logger.info(f"Step {step} stdout: {result.stdout[:500]}")
-            if result.stderr:
-                logger.warning(f"Step {step} stderr: {result.stderr}")  # Log full stderr
+            # Log output for debugging (the end of stdout carries the script's summary)
+            if stdout:
+                logger.info(f"Step {step} stdout: {stdout[-500:]}")
+            if stderr:
+                logger.warning(f"Step {step} stderr: {stderr}")
             
             # Check for successful execution
-            if result.returncode != 0:
-                error_msg = f"Script {script_name} failed with return code {result.returncode}"
-                if result.stderr:
-                    error_msg += f": {result.stderr}"
-                if result.stdout:
+            if returncode != 0:
+                error_msg = f"Script {script_name} failed with return code {returncode}"
+                if stderr:
+                    error_msg += f": {stderr}"
+                if stdout:
                     # Also include stdout in error for debugging
-                    error_msg += f"\nStdout: {result.stdout}"
+                    error_msg += f"\nStdout: {stdout}"
                 raise RuntimeError(error_msg)
             
             # Load and validate output
             if output_file and os.path.exists(output_file):
-                with open(output_file, 'r', encoding='utf-8') as f:
-                    output_data = json.load(f)
+                output_data = read_json_file(output_file)
                 
                 # Store in pipeline state
                 with pipeline_state.lock:
@@ -367,12 +393,14 @@ class PipelineService:
                         'timestamp': datetime.now().isoformat()
                     }, f)
                 
+                # The whole output is rendered once for a short preview (previously three times)
+                data_preview = str(output_data)
                 return {
                     'status': 'success',
                     'step': step,
                     'message': f'Step {step} completed successfully',
                     'output_file': os.path.basename(output_file),
-                    'data_preview': str(output_data)[:200] + '...' if len(str(output_data)) > 200 else str(output_data)
+                    'data_preview': data_preview[:200] + '...' if len(data_preview) > 200 else data_preview
                 }
             else:
                 raise RuntimeError(f"Output file {output_file} not found after script execution")
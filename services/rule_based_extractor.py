@@ -8,6 +8,14 @@ from models.dfd_models import SimpleDFDComponents, SimpleDataFlow
 
 logger = logging.getLogger(__name__)
 
+# Defaults used when the patterns find nothing (copied into each result)
+_DEFAULT_ENTITIES = ("User", "Administrator")
+_DEFAULT_PROCESSES = ("Web Server", "Application Server")
+_DEFAULT_ASSETS = ("Database", "File Storage")
+_DEFAULT_TRUST_BOUNDARIES = ("External to Internal", "DMZ to Application", "Application to Data")
+_DEFAULT_ASSUMPTIONS = ("Rule-based extraction used", "Limited detail available")
+_DEFAULT_CONFIDENCE_NOTES = ("Manual review recommended",)
+
 class RuleBasedExtractor:
     """Rule-based DFD extractor as fallback."""
     
@@ -64,14 +72,14 @@ class RuleBasedExtractor:
         
         # Add default components if none found
         if not result.external_entities:
-            result.external_entities = ["User", "Administrator"]
+            result.external_entities = list(_DEFAULT_ENTITIES)
         if not result.processes:
-            result.processes = ["Web Server", "Application Server"]
+            result.processes = list(_DEFAULT_PROCESSES)
         if not result.assets:
-            result.assets = ["Database", "File Storage"]
+            result.assets = list(_DEFAULT_ASSETS)
         
         # Add basic trust boundaries
-        result.trust_boundaries = ["External to Internal", "DMZ to Application", "Application to Data"]
+        result.trust_boundaries = list(_DEFAULT_TRUST_BOUNDARIES)
         
         # Add basic data flows
         if len(result.external_entities) > 0 and len(result.processes) > 0:
@@ -96,7 +104,7 @@ class RuleBasedExtractor:
             )
             result.data_flows.append(flow)
         
-        result.assumptions = ["Rule-based extraction used", "Limited detail available"]
-        result.confidence_notes = ["Manual review recommended"]
+        result.assumptions = list(_DEFAULT_ASSUMPTIONS)
+        result.confidence_notes = list(_DEFAULT_CONFIDENCE_NOTES)
         
         return result
\ No newline at end of file
@@ -8,6 +8,13 @@ from models.threat_models import ThreatModel
 
 logger = logging.getLogger(__name__)
 
+# Risk matrix lookups, built once instead of per threat
+_IMPACT_VALUES = {"Critical": 4, "High": 3, "Medium": 2, "Low": 1}
+_LIKELIHOOD_VALUES = {"High": 3, "Medium": 2, "Low": 1}
+_MITIGATED_LIKELIHOOD = {"High": "Medium", "Medium": "Low", "Low": "Low"}
+# Indexed by impact * likelihood (at most 12): <3 Low, <6 Medium, <9 High, else Critical
+_RISK_BY_SCORE = ("Low",) * 3 + ("Medium",) * 3 + ("High",) * 3 + ("Critical",) * 4
+
 class ThreatEnrichmentService:
     """Service for enriching threats with additional context."""
     
@@ -34,11 +41,7 @@ class ThreatEnrichmentService:
         
         # Calculate residual risk
         current_likelihood = threat.get("likelihood", "Medium")
-        mitigated_likelihood = {
-            "High": "Medium",
-            "Medium": "Low",
-            "Low": "Low"
-        }.get(current_likelihood, "Low")
+        mitigated_likelihood = _MITIGATED_LIKELIHOOD.get(current_likelihood, "Low")
         
         threat["residual_risk_score"] = self.calculate_risk_score(
             threat.get("impact", "Medium"), 
@@ -59,21 +62,8 @@ class ThreatEnrichmentService:
     
     def calculate_risk_score(self, impact: str, likelihood: str) -> str:
         """Calculate risk score based on impact and likelihood matrix."""
-        impact_values = {"Critical": 4, "High": 3, "Medium": 2, "Low": 1}
-        likelihood_values = {"High": 3, "Medium": 2, "Low": 1}
-        
-        impact_val = impact_values.get(impact, 1)
-        likelihood_val = likelihood_values.get(likelihood, 1)
-        score = impact_val * likelihood_val
-        
-        if score >= 9:
-            return "Critical"
-        elif score >= 6:
-            return "High"
-        elif score >= 3:
-            return "Medium"
-        else:
-            return "Low"
+        score = _IMPACT_VALUES.get(impact, 1) * _LIKELIHOOD_VALUES.get(likelihood, 1)
+        return _RISK_BY_SCORE[score]
     
     def assess_exploitability(self, threat: Dict, dfd_data: Dict) -> str:
         """Assess exploitability based on component exposure."""
@@ -6,7 +6,7 @@ import os
 import json
 import logging
 import time
-import asyncio
+from collections import Counter
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 
@@ -14,6 +14,7 @@ from models.threat_models import ThreatModel, ComponentAnalysis
 from services.component_risk_analyzer import ComponentRiskAnalyzer
 from services.stride_threat_generator import StrideThreatGenerator
 from services.threat_deduplication_service import ThreatDeduplicationService
+from utils.async_utils import run_async
 
 logger = logging.getLogger(__name__)
 
@@ -42,12 +43,8 @@ class ThreatGenerationService:
         if self.config.get('enable_async_processing', True) and not self.config.get('force_rule_based', False):
             logger.info("⚡ Using async processing for threat generation")
             try:
-                # Run async in event loop
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                result = loop.run_until_complete(self._generate_threats_async(dfd_data))
-                loop.close()
-                return result
+                # Run async in a fresh event loop
+                return run_async(self._generate_threats_async(dfd_data))
             except Exception as e:
                 logger.error(f"Async processing failed: {e}")
                 if self.config.get('debug_mode', False):
@@ -214,10 +211,7 @@ class ThreatGenerationService:
     
     def _log_component_breakdown(self, components: List[ComponentAnalysis]):
         """Log component type breakdown."""
-        component_types = {}
-        for comp in components:
-            comp_type = comp.type
-            component_types[comp_type] = component_types.get(comp_type, 0) + 1
+        component_types = Counter(comp.type for comp in components)
         
         logger.info("Component breakdown:")
         for comp_type, count in component_types.items():
@@ -230,13 +224,9 @@ class ThreatGenerationService:
         # Convert threats to dictionaries
         threat_dicts = [threat.to_dict() for threat in threats]
         
-        # Calculate risk breakdown
-        risk_breakdown = {
-            "Critical": sum(1 for t in threats if t.risk_score == 'Critical'),
-            "High": sum(1 for t in threats if t.risk_score == 'High'),
-            "Medium": sum(1 for t in threats if t.risk_score == 'Medium'),
-            "Low": sum(1 for t in threats if t.risk_score == 'Low')
-        }
+        # Calculate risk breakdown in a single pass
+        risk_counts = Counter(t.risk_score for t in threats)
+        risk_breakdown = {level: risk_counts[level] for level in ("Critical", "High", "Medium", "Low")}
         
         # Determine generation method
         generation_method = "LLM"
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test that semantic extraction cache hits never cross extraction settings
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import services.extraction_cache as extraction_cache
+from services.extraction_cache import SemanticExtractionCache
+from services.dfd_extraction_service import settings_fingerprint
+
+def _settings_key(llm_model):
+    """Fingerprint the settings with the same helper DFDExtractionService uses."""
+    return settings_fingerprint({'llm_provider': 'scaleway', 'llm_model': llm_model}, per_document=False)
+
+@contextmanager
+def _semantic_cache():
+    """Yield a cache in a temporary directory, restoring the availability flag afterwards."""
+    # Lookups only compare stored vectors; the embedding model is not needed
+    available = extraction_cache.SEMANTIC_CACHE_AVAILABLE
+    extraction_cache.SEMANTIC_CACHE_AVAILABLE = True
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            yield SemanticExtractionCache(cache_dir)
+    finally:
+        extraction_cache.SEMANTIC_CACHE_AVAILABLE = available
+
+def test_model_change_does_not_reuse_semantic_entry():
+    """An identical corpus extracted with another model must not match."""
+    embedding = np.ones(8, dtype=np.float32) / np.sqrt(8)
+    with _semantic_cache() as cache:
+        cache.add(embedding, "model_a_result", 1000, _settings_key('llama-3.3-70b-instruct'))
+
+        assert cache.lookup(embedding, 1000, _settings_key('mistral-small-3.1-24b-instruct-2503')) is None
+        assert cache.lookup(embedding, 1000, _settings_key('llama-3.3-70b-instruct')) == "model_a_result"
+
+def test_entries_without_settings_never_match():
+    """Entries written before settings were recorded are not trusted."""
+    embedding = np.ones(8, dtype=np.float32) / np.sqrt(8)
+    with _semantic_cache() as cache:
+        cache.add(embedding, "legacy_result", 1000, _settings_key('llama-3.3-70b-instruct'))
+        del cache._entries[0]["settings"]
+
+        assert cache.lookup(embedding, 1000, _settings_key('llama-3.3-70b-instruct')) is None
+
+def test_lookup_does_not_rewrite_index():
+    """A hit only bumps last_used in memory; the index file is rewritten by the next add."""
+    embedding = np.ones(8, dtype=np.float32) / np.sqrt(8)
+    with _semantic_cache() as cache:
+        settings_key = _settings_key('llama-3.3-70b-instruct')
+        cache.add(embedding, "result", 1000, settings_key)
+        saved = os.path.getmtime(cache._index_path)
+        os.utime(cache._index_path, (saved - 60, saved - 60))
+
+        assert cache.lookup(embedding, 1000, settings_key) == "result"
+        assert os.path.getmtime(cache._index_path) == saved - 60
+
+if __name__ == "__main__":
+    test_model_change_does_not_reuse_semantic_entry()
+    test_entries_without_settings_never_match()
+    test_lookup_does_not_rewrite_index()
+    print("✅ Semantic cache tests passed")
@@ -0,0 +1,22 @@
+"""
+Event loop helpers for running the async LLM code from synchronous entry points.
+"""
+import asyncio
+from typing import Any, Awaitable
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+def new_event_loop() -> asyncio.AbstractEventLoop:
+    """Create an event loop, using uvloop's faster implementation when installed."""
+    if UVLOOP_AVAILABLE:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+def run_async(coro: Awaitable[Any]) -> Any:
+    """Run a coroutine to completion on a fresh loop, like asyncio.run."""
+    with asyncio.Runner(loop_factory=new_event_loop) as runner:
+        return runner.run(coro)
@@ -6,9 +6,12 @@ import os
 import sys
 import json
 import time
+import atexit
 import threading
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+
+from utils.file_utils import write_json_file
 
 # ANSI color codes for terminal
 class Colors:
@@ -22,6 +25,74 @@ class Colors:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
+class _ProgressFileWriter:
+    """Writes progress files from a background thread, keeping only the latest update per file"""
+    
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval  # at most ~10 writes per second per file
+        self._pending: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._lock = threading.Lock()
+        # Held while writing or removing files so a stale write never lands after a newer one
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def submit(self, path: str, data: Dict[str, Any]):
+        """Queue data for path, replacing any update that has not been written yet"""
+        submitted_at = time.time()
+        with self._lock:
+            self._pending[path] = (data, submitted_at)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='progress-writer', daemon=True)
+                self._thread.start()
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+    
+    def flush(self):
+        """Write all pending updates now"""
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for path, (data, submitted_at) in pending.items():
+                try:
+                    # Only the update that actually gets written pays for timestamp formatting
+                    data['timestamp'] = datetime.fromtimestamp(submitted_at).isoformat()
+                    tmp_path = f"{path}.tmp"
+                    write_json_file(tmp_path, data)
+                    # Readers poll this file, so never expose a half-written one
+                    os.replace(tmp_path, path)
+                except Exception as e:
+                    print(f"Warning: Could not write progress file: {e}")
+    
+    def remove(self, path: str):
+        """Drop any pending update for path and delete the file"""
+        with self._write_lock:
+            with self._lock:
+                self._pending.pop(path, None)
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except:
+                pass
+    
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.flush()
+            time.sleep(self.interval)
+
+_progress_writer = _ProgressFileWriter()
+# Scripts exit right after their final update, before the writer thread wakes up
+atexit.register(_progress_writer.flush)
+
+def write_progress_file(progress_file: str, progress_data: Dict[str, Any]):
+    """Queue a progress file update, stamped with the submit time when it is written.
+    A step's final update is written straight away."""
+    _progress_writer.submit(progress_file, progress_data)
+    if progress_data['current'] >= progress_data['total']:
+        _progress_writer.flush()
+
 class ProgressTracker:
     """Enhanced progress tracker with console display"""
     
@@ -62,13 +133,11 @@ class ProgressTracker:
                 'progress': round((self.current / self.total_steps * 100) if self.total_steps > 0 else 0, 1),
                 'message': self.message,
                 'details': self.details,
-                'timestamp': datetime.now().isoformat(),
                 'elapsed_seconds': round(time.time() - self.start_time, 1)
             }
             
             progress_file = os.path.join(self.output_dir, f'step_{self.step}_progress.json')
-            with open(progress_file, 'w') as f:
-                json.dump(progress_data, f, indent=2)
+            write_progress_file(progress_file, progress_data)
                 
         except Exception as e:
             print(f"Warning: Could not write progress file: {e}")
@@ -121,12 +190,7 @@ class ProgressTracker:
         self.update(self.total_steps, message, "")
         
         # Clean up progress file
-        try:
-            progress_file = os.path.join(self.output_dir, f'step_{self.step}_progress.json')
-            if os.path.exists(progress_file):
-                os.remove(progress_file)
-        except:
-            pass
+        _progress_writer.remove(os.path.join(self.output_dir, f'step_{self.step}_progress.json'))
     
     def fail(self, error_message: str):
         """Mark step as failed"""
@@ -185,14 +249,8 @@ def check_kill_signal(step: int) -> bool:
 
 def cleanup_progress_file(step: int):
     """Clean up progress file after successful completion"""
-    try:
-        output_dir = os.getenv('OUTPUT_DIR', './output')
-        progress_file = os.path.join(output_dir, f'step_{step}_progress.json')
-        
-        if os.path.exists(progress_file):
-            os.remove(progress_file)
-    except:
-        pass
+    output_dir = os.getenv('OUTPUT_DIR', './output')
+    _progress_writer.remove(os.path.join(output_dir, f'step_{step}_progress.json'))
 
 
 # Progress monitoring thread for web UI
@@ -4,72 +4,147 @@ File handling utilities for the threat modeling pipeline.
 import os
 import json
 import logging
+import atexit
+import functools
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from typing import Tuple, Optional, Any
 
 logger = logging.getLogger(__name__)
 
-# Try to import optional dependencies
 try:
-    import PyPDF2
-    PDF_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    PDF_AVAILABLE = False
+    ORJSON_AVAILABLE = False
 
-try:
-    from docx import Document as DocxDocument
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
+# Optional document parsers are only imported when a file of that type is processed
+PYMUPDF_AVAILABLE = importlib.util.find_spec('pymupdf') is not None
+PYPDF2_AVAILABLE = importlib.util.find_spec('PyPDF2') is not None
+PDF_AVAILABLE = PYMUPDF_AVAILABLE or PYPDF2_AVAILABLE
+DOCX_AVAILABLE = importlib.util.find_spec('docx') is not None
 
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'doc', 'docx'}
 
+# Each PDF worker process gets at least this many pages, so small files stay in-process
+_PDF_PAGES_PER_WORKER = 8
+_PDF_MAX_WORKERS = 8
+
 def allowed_file(filename: str) -> bool:
     """Check if file extension is allowed."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+@functools.lru_cache(maxsize=1)
+def _pdf_pool() -> ProcessPoolExecutor:
+    """Process pool shared by all PDF extractions, so workers are spawned once per process."""
+    pool = ProcessPoolExecutor(max_workers=min(_PDF_MAX_WORKERS, os.cpu_count() or 1))
+    atexit.register(pool.shutdown, wait=False, cancel_futures=True)
+    return pool
+
+def _extract_pdf_pages(file_path: str, start: int, stop: int) -> str:
+    """Extract text from pages [start, stop) with a reader private to this worker."""
+    import PyPDF2
+    with open(file_path, 'rb') as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        return "".join(pdf_reader.pages[i].extract_text() for i in range(start, stop))
+
+def _extract_pdf_text(file_path: str) -> str:
+    """Extract PDF text, preferring PyMuPDF's native parser over pure-Python PyPDF2."""
+    if PYMUPDF_AVAILABLE:
+        import pymupdf
+        with pymupdf.open(file_path) as doc:
+            text_content = "".join(page.get_text() for page in doc)
+        if not text_content.strip():
+            # Scanned PDF without a text layer; PyPDF2 would not find any text either
+            logger.warning(f"No extractable text in {file_path} (scanned PDF?)")
+        return text_content
+    return _extract_pdf_text_pypdf2(file_path)
+
+def _extract_pdf_text_pypdf2(file_path: str) -> str:
+    """Extract PDF text with PyPDF2, splitting large documents into page ranges across processes."""
+    import PyPDF2
+    with open(file_path, 'rb') as f:
+        page_count = len(PyPDF2.PdfReader(f).pages)
+    
+    workers = min(_PDF_MAX_WORKERS, os.cpu_count() or 1, page_count // _PDF_PAGES_PER_WORKER)
+    if workers < 2:
+        return _extract_pdf_pages(file_path, 0, page_count)
+    
+    # PyPDF2 is pure Python, so page extraction only scales across processes
+    bounds = [page_count * i // workers for i in range(workers + 1)]
+    try:
+        return "".join(_pdf_pool().map(_extract_pdf_pages, [file_path] * workers, bounds[:-1], bounds[1:]))
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool next time
+        logger.warning(f"PDF worker pool failed while reading {file_path}, extracting in-process")
+        _pdf_pool.cache_clear()
+        return _extract_pdf_pages(file_path, 0, page_count)
+
+def _read_text_file(file_path: str) -> str:
+    """Read a plain text file, replacing undecodable bytes."""
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+def _extract_docx_text(file_path: str) -> str:
+    """Extract paragraph text from a Word document, one paragraph per line."""
+    from docx import Document as DocxDocument
+    doc = DocxDocument(file_path)
+    return "".join(paragraph.text + "\n" for paragraph in doc.paragraphs)
+
+# Text extractor per file extension, and the error for types whose parser is not installed
+_TEXT_EXTRACTORS = {
+    'txt': _read_text_file,
+    'pdf': _extract_pdf_text,
+    'doc': _extract_docx_text,
+    'docx': _extract_docx_text,
+}
+_MISSING_PARSER_ERRORS = {}
+if not PDF_AVAILABLE:
+    _MISSING_PARSER_ERRORS['pdf'] = "PDF support not available. Please install PyMuPDF or PyPDF2."
+if not DOCX_AVAILABLE:
+    _MISSING_PARSER_ERRORS['doc'] = _MISSING_PARSER_ERRORS['docx'] = \
+        "DOCX support not available. Please install python-docx."
+
 def extract_text_from_file(file_path: str) -> Tuple[Optional[str], Optional[str]]:
     """Extract text content from various file formats."""
     if not os.path.exists(file_path):
         return None, f"File not found: {file_path}"
     
-    file_ext = file_path.lower().split('.')[-1]
-    text_content = ""
+    file_ext = file_path.lower().rpartition('.')[2]
+    extractor = _TEXT_EXTRACTORS.get(file_ext)
+    if extractor is None:
+        return None, f"Unsupported file format: {file_ext}"
+    if file_ext in _MISSING_PARSER_ERRORS:
+        return None, _MISSING_PARSER_ERRORS[file_ext]
     
     try:
-        if file_ext == 'txt':
-            # Try different encodings for text files
-            for encoding in ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
-                try:
-                    with open(file_path, 'r', encoding=encoding, errors='replace') as f:
-                        text_content = f.read()
-                    break
-                except UnicodeDecodeError:
-                    continue
-                    
-        elif file_ext == 'pdf' and PDF_AVAILABLE:
-            with open(file_path, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                for page in pdf_reader.pages:
-                    text_content += page.extract_text()
-                        
-        elif file_ext in ['doc', 'docx'] and DOCX_AVAILABLE:
-            doc = DocxDocument(file_path)
-            for paragraph in doc.paragraphs:
-                text_content += paragraph.text + "\n"
-                
-        elif file_ext == 'pdf' and not PDF_AVAILABLE:
-            return None, "PDF support not available. Please install PyPDF2."
-            
-        elif file_ext in ['doc', 'docx'] and not DOCX_AVAILABLE:
-            return None, "DOCX support not available. Please install python-docx."
-            
-        else:
-            return None, f"Unsupported file format: {file_ext}"
-    
+        return extractor(file_path), None
     except Exception as e:
         return None, str(e)
+
+def read_json_file(file_path: str) -> Any:
+    """Load a UTF-8 JSON file, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def write_json_file(file_path: str, data: Any) -> None:
+    """Write data as indented UTF-8 JSON, using orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        try:
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError as e:
+            logger.debug(f"orjson could not serialize {file_path}, falling back to json: {e}")
+        else:
+            with open(file_path, 'wb') as f:
+                f.write(payload)
+            return
     
-    return text_content, None
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
 
 def save_step_data(step: int, data: Any, output_folder: str):
     """Save step data to file."""
@@ -81,6 +156,4 @@ def save_step_data(step: int, data: Any, output_folder: str):
     }
     
     if step in files:
-        file_path = os.path.join(output_folder, files[step])
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
\ No newline at end of file
+        write_json_file(os.path.join(output_folder, files[step]), data)
\ No newline at end of file
@@ -4,16 +4,18 @@ This is a patched version that adds console progress bars
 """
 import os
 import sys
-import json
 import time
 from datetime import datetime
 from typing import Optional
 
+from utils.file_utils import write_json_file
+
 # Import the enhanced progress system
 try:
     from .enhanced_progress import (
         ProgressTracker, ProgressLogger, Colors,
         write_progress as enhanced_write_progress,
+        write_progress_file as enhanced_write_progress_file,
         check_kill_signal as enhanced_check_kill_signal,
         cleanup_progress_file as enhanced_cleanup_progress_file
     )
@@ -39,7 +41,7 @@ def write_progress(step: int, current: int, total: int, message: str, details: s
         if current >= total:
             del _progress_trackers[step]
     else:
-        # Fallback to original implementation
+        # Plain progress file without the console display
         try:
             progress_data = {
                 'step': step,
@@ -47,15 +49,17 @@ def write_progress(step: int, current: int, total: int, message: str, details: s
                 'total': total,
                 'progress': round((current / total * 100) if total > 0 else 0, 1),
                 'message': message,
-                'details': details,
-                'timestamp': datetime.now().isoformat()
+                'details': details
             }
             
             output_dir = os.getenv('OUTPUT_DIR', './output')
             progress_file = os.path.join(output_dir, f'step_{step}_progress.json')
             
-            with open(progress_file, 'w') as f:
-                json.dump(progress_data, f, indent=2)
+            if ENHANCED_AVAILABLE:
+                enhanced_write_progress_file(progress_file, progress_data)
+            else:
+                progress_data['timestamp'] = datetime.now().isoformat()
+                write_json_file(progress_file, progress_data)
                 
         except Exception as e:
             print(f"Warning: Could not write progress: {e}")